@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from clients.domains import DomainAllowlist
+from clients.models import Client, ClientDomain
+from scorm.models import ScormAssignment
+
+_MISSING = object()
+
+# What the launch and status paths need of each row. Client credentials are never
+# cached, as entries are shared through the Django cache backend.
+CachedClient = namedtuple("CachedClient", ["id", "first_name", "company"])
+CachedScormAsset = namedtuple("CachedScormAsset", ["id", "scorm_id", "title"])
+CachedAssignment = namedtuple(
+    "CachedAssignment",
+    ["pk", "client_id", "scorm_asset_id", "validity_start_date", "validity_end_date", "client", "scorm_asset"],
+)
+
+
+class VersionedCache:
+    """
+    A per-process LRU in front of the Django cache backend, invalidated by a shared version key.
+
+    Every entry is stored under the current version. Bumping the version, which the
+    post_save/post_delete signals do, makes every worker drop what it has cached the
+    next time it checks the version. Workers only re-read the version key every
+    `version_ttl` seconds, so that is how long a change can take to be seen.
+    Entries also expire from the per-process LRU after `local_ttl` seconds, so a
+    missed invalidation is never served for longer than that.
+
+    Attributes:
+        namespace (str): The prefix of every key written to the Django cache.
+        maxsize (int): The number of entries kept in the per-process LRU.
+        timeout (int): The number of seconds entries live in the Django cache.
+        version_ttl (float): The number of seconds between two reads of the version key.
+        local_ttl (float): The number of seconds entries live in the per-process LRU.
+    """
+
+    COUNTERS = ("local_hits", "shared_hits", "misses")
+
+    def __init__(self, namespace, maxsize=1024, timeout=300, version_ttl=1.0, local_ttl=30.0):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.version_ttl = version_ttl
+        self.local_ttl = local_ttl
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._unflushed = dict.fromkeys(self.COUNTERS, 0)
+
+    @property
+    def version_key(self) -> str:
+        return f"{self.namespace}:version"
+
+    def current_version(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < self.version_ttl:
+            return self._version
+
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        self._flush_counters()
+
+        with self._lock:
+            if version != self._version:
+                self._local.clear()
+                self._version = version
+            self._version_checked_at = now
+        return version
+
+    def get(self, key, loader):
+        """
+        Returns the cached value for `key`, calling `loader` to produce it on a miss.
+
+        A loader returning None is cached too, so unknown IDs do not reach the database
+        again until the next invalidation.
+        """
+        version = self.current_version()
+        now = time.monotonic()
+
+        with self._lock:
+            value, expires_at = self._local.get(key, (_MISSING, None))
+            if value is not _MISSING and expires_at <= now:
+                del self._local[key]
+                value = _MISSING
+            elif value is not _MISSING:
+                self._local.move_to_end(key)
+        if value is not _MISSING:
+            self._count("local_hits")
+            return value
+
+        shared_key = f"{self.namespace}:{version}:{key}"
+        value = cache.get(shared_key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            cache.set(shared_key, value, self.timeout)
+            self._count("misses")
+        else:
+            self._count("shared_hits")
+
+        with self._lock:
+            self._local[key] = (value, now + self.local_ttl)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+        return value
+
+    def invalidate(self):
+        """
+        Bumps the shared version so every worker stops using its cached entries.
+        """
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), None)
+        with self._lock:
+            self._local.clear()
+            self._version = None
+
+    def stats(self) -> dict:
+        """
+        Returns this process's hit/miss counters.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._local)
+        return stats
+
+    def shared_stats(self) -> dict:
+        """
+        Returns the hit/miss counters summed over every process that has flushed them.
+        """
+        self._flush_counters()
+        keys = {name: f"{self.namespace}:stats:{name}" for name in self.COUNTERS}
+        values = cache.get_many(keys.values())
+        return {name: values.get(key, 0) for name, key in keys.items()}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+            self._unflushed[name] += 1
+
+    def _flush_counters(self):
+        with self._lock:
+            unflushed = {name: count for name, count in self._unflushed.items() if count}
+            self._unflushed = dict.fromkeys(self.COUNTERS, 0)
+        for name, count in unflushed.items():
+            key = f"{self.namespace}:stats:{name}"
+            if not cache.add(key, count, None):
+                try:
+                    cache.incr(key, count)
+                except ValueError:
+                    cache.set(key, count, None)
+
+
+authorization_cache = VersionedCache(
+    "authz",
+    maxsize=settings.AUTHZ_CACHE_MAXSIZE,
+    timeout=settings.AUTHZ_CACHE_TIMEOUT,
+    version_ttl=settings.AUTHZ_CACHE_VERSION_TTL,
+    local_ttl=settings.AUTHZ_CACHE_LOCAL_TTL,
+)
+
+
+def _load_client(client_id):
+    client = Client.objects.filter(id=client_id).values("id", "first_name", "company").first()
+    return CachedClient(**client) if client else None
+
+
+def _load_assignment(client_id, scorm_id):
+    assignment = (
+        ScormAssignment.objects.filter(client_id=client_id, scorm_asset_id=scorm_id)
+        .values(
+            "pk",
+            "client_id",
+            "scorm_asset_id",
+            "validity_start_date",
+            "validity_end_date",
+            "client__first_name",
+            "client__company",
+            "scorm_asset__scorm_id",
+            "scorm_asset__title",
+        )
+        .order_by("pk")
+        .first()
+    )
+    if assignment is None:
+        return None
+    return CachedAssignment(
+        pk=assignment["pk"],
+        client_id=assignment["client_id"],
+        scorm_asset_id=assignment["scorm_asset_id"],
+        validity_start_date=assignment["validity_start_date"],
+        validity_end_date=assignment["validity_end_date"],
+        client=CachedClient(assignment["client_id"], assignment["client__first_name"], assignment["client__company"]),
+        scorm_asset=CachedScormAsset(
+            assignment["scorm_asset_id"], assignment["scorm_asset__scorm_id"], assignment["scorm_asset__title"]
+        ),
+    )
+
+
+def get_client(client_id):
+    """
+    Returns the CachedClient with the given ID, or None if there is no such client.
+    """
+    return authorization_cache.get(f"client:{client_id}", lambda: _load_client(client_id))
+
+
+def get_domain_allowlist(client_id) -> DomainAllowlist:
+    """
+    Returns the index of the domains the client's learners may launch from.
+    """
+    return authorization_cache.get(
+        f"domains:{client_id}",
+        lambda: DomainAllowlist(
+            ClientDomain.objects.filter(client_id=client_id).values_list("host", "include_subdomains")
+        ),
+    )
+
+
+def get_assignment(client_id, scorm_id):
+    """
+    Returns the CachedAssignment of a SCORM asset to a client, with its client and asset.
+
+    Seats are not cached; use ScormAssignment.claim_seat on the assignment's pk to take one.
+    """
+    return authorization_cache.get(
+        f"assignment:{client_id}:{scorm_id}",
+        lambda: _load_assignment(client_id, scorm_id),
+    )
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backends whose entries are not seen by other processes
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Refuses a process-local default cache outside DEBUG and test runs.
+
+    The authorization cache is invalidated through a version key in the default cache,
+    and the sync, ingest, wrapper build and rollout locks are cache.add calls on it.
+    With a per-process cache, invalidations never reach the other workers and none of
+    the locks hold across processes.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if settings.DEBUG or settings.TESTING or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            f"The default cache ({backend}) is not shared between processes.",
+            hint="Point CACHE_REDIS_URL at the Redis shared by the web and Celery workers.",
+            id="api.E001",
+        )
+    ]
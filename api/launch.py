@@ -0,0 +1,116 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from clients.models import ClientUser
+from scorm.models import UserScormMapping
+
+from .cache import CachedAssignment, CachedClient, CachedScormAsset, get_assignment, get_client, get_domain_allowlist
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LaunchDecision:
+    """
+    The outcome of authorizing a learner's launch of an assigned SCORM package.
+
+    Attributes:
+        allowed (bool): Whether the launch may proceed.
+        error (str): The error message returned to the caller when the launch is refused.
+        status (int): The HTTP status code to respond with.
+        client (CachedClient): The client that owns the assignment.
+        assignment (CachedAssignment): The matching SCORM assignment.
+        scorm_asset (CachedScormAsset): The assigned SCORM asset.
+        client_user_id (int): The primary key of the learner's ClientUser, if one exists.
+        cloudscorm_user_id (str): The learner's CloudScorm user ID, if already provisioned.
+        has_seat (bool): Whether the learner already holds a seat on the assignment.
+        launch_url (str): The launch URL stored on the learner's seat by an earlier launch.
+    """
+
+    allowed: bool
+    error: Optional[str] = None
+    status: int = 200
+    client: Optional[CachedClient] = None
+    assignment: Optional[CachedAssignment] = None
+    scorm_asset: Optional[CachedScormAsset] = None
+    client_user_id: Optional[int] = None
+    cloudscorm_user_id: Optional[str] = None
+    has_seat: bool = False
+    launch_url: Optional[str] = None
+
+    @classmethod
+    def deny(cls, error, status=400) -> "LaunchDecision":
+        return cls(allowed=False, error=error, status=status)
+
+
+def _is_within_validity(assignment, now) -> bool:
+    # A missing bound leaves that side of the validity window open
+    if assignment.validity_start_date and now < assignment.validity_start_date:
+        return False
+    if assignment.validity_end_date and now > assignment.validity_end_date:
+        return False
+    return True
+
+
+def decide_launch(client_id, scorm_id, referring_domain, learner_id) -> LaunchDecision:
+    """
+    Resolves everything needed to authorize a launch.
+
+    The client, its domain allowlist, the assignment validity window and the SCORM
+    asset come from the authorization cache, so forged, expired or off-domain
+    launches are refused without touching the database. The learner's ClientUser,
+    seat and memoized launch URL are then read in a single query. Seats are not checked here; they are
+    taken atomically by ScormAssignment.claim_seat.
+
+    Args:
+        client_id (int): The ID of the client.
+        scorm_id (int): The ID of the SCORM asset.
+        referring_domain (str): The referring domain of the learner.
+        learner_id (str): The unique learner identifier.
+
+    Returns:
+        LaunchDecision: The authorization outcome.
+    """
+    assignment = get_assignment(client_id, scorm_id)
+
+    if assignment is None:
+        client = get_client(client_id)
+        if client is None:
+            return LaunchDecision.deny("Invalid client identifier")
+        if not get_domain_allowlist(client.id).allows(referring_domain):
+            return LaunchDecision.deny("Invalid referring domain")
+        return LaunchDecision.deny("License invalid")
+
+    client = assignment.client
+    if not get_domain_allowlist(client.id).allows(referring_domain):
+        return LaunchDecision.deny("Invalid referring domain")
+
+    if not _is_within_validity(assignment, timezone.now()):
+        return LaunchDecision.deny("License invalid")
+
+    seat = UserScormMapping.objects.filter(assignment_id=assignment.pk, user=OuterRef("pk"))
+    learner = (
+        ClientUser.objects.filter(learner_id=learner_id, client_id=client.id)
+        .annotate(
+            has_seat=Exists(seat),
+            launch_url=Subquery(seat.values("launch_url")[:1]),
+        )
+        .values("pk", "cloudscorm_user_id", "has_seat", "launch_url")
+        .order_by("pk")
+        .first()
+    ) or {}
+
+    return LaunchDecision(
+        allowed=True,
+        client=client,
+        assignment=assignment,
+        scorm_asset=assignment.scorm_asset,
+        client_user_id=learner.get("pk"),
+        cloudscorm_user_id=learner.get("cloudscorm_user_id"),
+        has_seat=learner.get("has_seat", False),
+        launch_url=learner.get("launch_url"),
+    )
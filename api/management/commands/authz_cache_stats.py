@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import authorization_cache
+
+
+class Command(BaseCommand):
+    help = 'Shows the authorization cache hit/miss counters summed over all workers.'
+
+    def handle(self, *args, **kwargs):
+        stats = authorization_cache.shared_stats()
+        lookups = sum(stats.values())
+        for name, count in stats.items():
+            self.stdout.write(f'{name}: {count}')
+        if lookups:
+            saved = lookups - stats['misses']
+            self.stdout.write(self.style.SUCCESS(f'DB reads avoided: {saved} of {lookups} ({saved / lookups:.1%})'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the per-client SCORM progress rollups from UserScormStatus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('client_ids', nargs='*', type=int, help='Only rebuild the rollups of these clients')
+
+    def handle(self, *args, **kwargs):
+        written = rebuild_rollups(kwargs['client_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} progress rollup(s)'))
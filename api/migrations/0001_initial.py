@@ -0,0 +1,41 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("clients", "0029_userscormstatus_unique_user_scorm_attempt"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatusSyncCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_mapping_id", models.BigIntegerField(default=0)),
+                ("last_completed_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "client",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_sync_cursor",
+                        to="clients.client",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatusEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cloudscorm_user_id", models.CharField(max_length=255)),
+                ("scorm_id", models.CharField(max_length=255)),
+                ("attempt", models.IntegerField()),
+                ("updated_at", models.DateTimeField()),
+                ("payload", models.JSONField()),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="statusevent",
+            constraint=models.UniqueConstraint(
+                fields=("cloudscorm_user_id", "scorm_id", "attempt", "updated_at"),
+                name="unique_status_event",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_statusevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="statusevent",
+            name="dead_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="statusevent",
+            name="failures",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="statusevent",
+            name="last_error",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
@@ -1,3 +1,65 @@
 from django.db import models
 
-# Create your models here.
+from clients.models import Client
+
+
+class StatusSyncCursor(models.Model):
+    """
+    Records how far the bulk status sync has walked a client's UserScormMappings.
+
+    Attributes:
+        client (Client): The client the cursor belongs to.
+        last_mapping_id (int): The ID of the last mapping synced; the next run resumes after it.
+        last_completed_at (datetime): When the sync last reached the end of the client's mappings.
+        updated_at (datetime): When the cursor last moved.
+    """
+
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, related_name="status_sync_cursor")
+    last_mapping_id = models.BigIntegerField(default=0)
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Status sync cursor for {self.client}"
+
+
+class StatusEvent(models.Model):
+    """
+    A learner status event pushed by CloudScorm, waiting to be written to UserScormStatus.
+
+    The unique constraint makes redelivered events a no-op while they are queued.
+    An event that cannot be written STATUS_INGEST_MAX_FAILURES times is dead-lettered:
+    it is kept, with its last error, but no longer drained.
+
+    Attributes:
+        cloudscorm_user_id (str): The CloudScorm user the event is about.
+        scorm_id (str): The CloudScorm SCORM ID the event is about.
+        attempt (int): The attempt number.
+        updated_at (datetime): When CloudScorm last updated the attempt.
+        payload (dict): The event as received, in CloudScorm's report format.
+        received_at (datetime): When the event was received.
+        failures (int): The number of drains the event failed in.
+        last_error (str): The error of the last failed drain.
+        dead_at (datetime): When the event was dead-lettered, or None while it is queued.
+    """
+
+    cloudscorm_user_id = models.CharField(max_length=255)
+    scorm_id = models.CharField(max_length=255)
+    attempt = models.IntegerField()
+    updated_at = models.DateTimeField()
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    failures = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    dead_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cloudscorm_user_id", "scorm_id", "attempt", "updated_at"],
+                name="unique_status_event",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Status event for {self.cloudscorm_user_id}, SCORM {self.scorm_id}, attempt {self.attempt}"
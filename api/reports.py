@@ -0,0 +1,83 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+# The precision of UserScormStatus.score_value
+SCORE_PLACES = Decimal("0.0001")
+SCORE_LIMIT = Decimal(10) ** 8
+# The largest UserScormStatus.total_seconds, an integer column
+TOTAL_SECONDS_LIMIT = 2**31 - 1
+
+# SCORM 2004 timeinterval (ISO 8601 duration), e.g. "PT1H30M5.25S" or "P1DT2H"
+ISO_DURATION = re.compile(
+    r"P(?:(?P<years>\d+(?:\.\d+)?)Y)?(?:(?P<months>\d+(?:\.\d+)?)M)?(?:(?P<weeks>\d+(?:\.\d+)?)W)?"
+    r"(?:(?P<days>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?"
+)
+# Years and months have no fixed length; these are the usual approximations
+ISO_UNIT_SECONDS = {
+    "years": 365 * 86400,
+    "months": 30 * 86400,
+    "weeks": 7 * 86400,
+    "days": 86400,
+    "hours": 3600,
+    "minutes": 60,
+    "seconds": 1,
+}
+
+
+def parse_score(value):
+    """
+    Parses the score of a CloudScorm report.
+
+    Returns:
+        Decimal: The score rounded to four places, or None if the attempt has no
+            score or it does not fit UserScormStatus.score_value.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        score = Decimal(value)
+    except InvalidOperation:
+        return None
+    if not score.is_finite() or abs(score) >= SCORE_LIMIT:
+        return None
+    return score.quantize(SCORE_PLACES)
+
+
+def parse_total_time(value):
+    """
+    Parses a total time into whole seconds.
+
+    Both the SCORM 1.2 "HHHH:MM:SS.SS" format and SCORM 2004 ISO 8601 durations such
+    as "PT1H30M5S" are read. The common 1.2 format is split by hand rather than
+    matched with a regex.
+
+    Returns:
+        int: The number of seconds, or None if the value cannot be read or it does not
+            fit UserScormStatus.total_seconds.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+
+    if value.startswith("P"):
+        match = ISO_DURATION.fullmatch(value)
+        if not match or value == "P" or value.endswith("T"):
+            return None
+        total = sum(float(amount) * ISO_UNIT_SECONDS[unit] for unit, amount in match.groupdict().items() if amount)
+        return int(total) if total <= TOTAL_SECONDS_LIMIT else None
+
+    parts = value.split(":")
+    if len(parts) != 3:
+        return None
+    try:
+        hours, minutes, seconds = int(parts[0]), int(parts[1]), float(parts[2])
+    except ValueError:
+        return None
+    if hours < 0 or not 0 <= minutes < 60 or not 0 <= seconds < 60:
+        return None
+    total = hours * 3600 + minutes * 60 + int(seconds)
+    return total if total <= TOTAL_SECONDS_LIMIT else None
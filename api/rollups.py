@@ -0,0 +1,166 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from clients.models import ClientUser, ScormProgressRollup, UserScormStatus
+
+ROLLUP_FIELDS = (
+    "learners",
+    "completed",
+    "incomplete",
+    "passed",
+    "failed",
+    "score_sum",
+    "score_count",
+    "total_seconds",
+)
+
+
+def contribution(status) -> Counter:
+    """
+    Returns what a learner's latest attempt adds to their client's rollup for the package.
+    """
+    return Counter(
+        {
+            "learners": 1,
+            "completed": int(status.complete_status == "completed"),
+            "incomplete": int(status.complete_status == "incomplete"),
+            "passed": int(status.satisfied_status == "passed"),
+            "failed": int(status.satisfied_status == "failed"),
+            "score_sum": status.score_value or Decimal(0),
+            "score_count": int(status.score_value is not None),
+            "total_seconds": status.total_seconds or 0,
+        }
+    )
+
+
+def latest_attempts(statuses) -> dict:
+    """
+    Returns the stored latest attempt of every learner and package the statuses are about.
+
+    Returns:
+        dict: The latest UserScormStatus by (client_user_id, _scorm_id).
+    """
+    statuses = [status for status in statuses if status.client_user_id is not None]
+    if not statuses:
+        return {}
+    latest = {}
+    stored = UserScormStatus.objects.filter(
+        client_user_id__in={status.client_user_id for status in statuses},
+        _scorm_id__in={status._scorm_id for status in statuses},
+    ).only(
+        "client_user_id", "_scorm_id", "attempt", "complete_status", "satisfied_status", "score_value", "total_seconds"
+    )
+    for status in stored:
+        key = (status.client_user_id, status._scorm_id)
+        if key not in latest or status.attempt > latest[key].attempt:
+            latest[key] = status
+    return latest
+
+
+def apply_status_changes(previous, statuses):
+    """
+    Updates the rollups for statuses that have just been written over `previous`.
+
+    Only learners whose latest attempt changed move their rollup: the old latest
+    attempt's contribution is taken out and the new one's put in. Every rollup is
+    changed with a single relative UPDATE.
+
+    Args:
+        previous (dict): The latest attempts before the write, as returned by latest_attempts.
+        statuses (iterable): The UserScormStatus rows that were written.
+    """
+    current = dict(previous)
+    for status in statuses:
+        if status.client_user_id is None:
+            continue
+        key = (status.client_user_id, status._scorm_id)
+        if key not in current or status.attempt >= current[key].attempt:
+            current[key] = status
+
+    changed = [key for key, status in current.items() if previous.get(key) is not status]
+    if not changed:
+        return
+
+    client_ids = dict(
+        ClientUser.objects.filter(id__in={client_user_id for client_user_id, _ in changed}).values_list(
+            "id", "client_id"
+        )
+    )
+    deltas = defaultdict(Counter)
+    for key in changed:
+        client_user_id, scorm_id = key
+        if client_user_id not in client_ids:
+            continue
+        delta = deltas[(client_ids[client_user_id], scorm_id)]
+        delta.update(contribution(current[key]))
+        if key in previous:
+            delta.subtract(contribution(previous[key]))
+
+    ScormProgressRollup.objects.bulk_create(
+        [ScormProgressRollup(client_id=client_id, scorm_id=scorm_id) for client_id, scorm_id in deltas],
+        ignore_conflicts=True,
+    )
+    now = timezone.now()
+    for (client_id, scorm_id), delta in deltas.items():
+        ScormProgressRollup.objects.filter(client_id=client_id, scorm_id=scorm_id).update(
+            updated_at=now,
+            **{field: F(field) + delta[field] for field in ROLLUP_FIELDS if delta[field]},
+        )
+
+
+def rebuild_rollups(client_ids=None) -> int:
+    """
+    Recomputes the rollups from UserScormStatus, replacing the stored ones.
+
+    The totals are aggregated in SQL over each learner's latest attempt.
+
+    Args:
+        client_ids (list): Only rebuild the rollups of these clients. Defaults to all clients.
+
+    Returns:
+        int: The number of rollups written.
+    """
+    latest_attempt = (
+        UserScormStatus.objects.filter(client_user=OuterRef("client_user"), _scorm_id=OuterRef("_scorm_id"))
+        .order_by("-attempt")
+        .values("attempt")[:1]
+    )
+    totals = (
+        UserScormStatus.objects.filter(client_user__isnull=False, attempt=Subquery(latest_attempt))
+        .values("client_user__client_id", "_scorm_id")
+        .order_by()
+        .annotate(
+            learners=Count("id"),
+            completed=Count("id", filter=Q(complete_status="completed")),
+            incomplete=Count("id", filter=Q(complete_status="incomplete")),
+            passed=Count("id", filter=Q(satisfied_status="passed")),
+            failed=Count("id", filter=Q(satisfied_status="failed")),
+            score_sum=Coalesce(Sum("score_value"), Value(Decimal(0)), output_field=DecimalField()),
+            score_count=Count("score_value"),
+            total_seconds=Coalesce(Sum("total_seconds"), Value(0)),
+        )
+    )
+    rollups = ScormProgressRollup.objects.all()
+    if client_ids:
+        totals = totals.filter(client_user__client_id__in=client_ids)
+        rollups = rollups.filter(client_id__in=client_ids)
+
+    with transaction.atomic():
+        rollups.delete()
+        written = ScormProgressRollup.objects.bulk_create(
+            (
+                ScormProgressRollup(
+                    client_id=total["client_user__client_id"],
+                    scorm_id=total["_scorm_id"],
+                    **{field: total[field] for field in ROLLUP_FIELDS},
+                )
+                for total in totals.iterator()
+            ),
+            batch_size=500,
+        )
+    return len(written)
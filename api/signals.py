@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from clients.models import Client, ClientDomain
+from scorm.models import ScormAssignment
+
+from .cache import authorization_cache
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=ClientDomain)
+@receiver(post_delete, sender=ClientDomain)
+@receiver(post_save, sender=ScormAssignment)
+@receiver(post_delete, sender=ScormAssignment)
+def invalidate_authorization_cache(sender, instance, **kwargs):
+    """
+    Drops the cached clients, domains and assignments whenever one of them changes.
+
+    The clients app is installed before this one, so its receiver has already
+    rebuilt a saved client's ClientDomain rows when this runs. The version is bumped
+    once the change is committed; bumping it earlier would let a concurrent reader
+    cache the old rows under the new version.
+    """
+    transaction.on_commit(authorization_cache.invalidate)
@@ -0,0 +1,242 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import StatusEvent
+from clients.models import ClientUser, UserScormStatus
+from my_scorm_project.http_client import http_client
+
+from .reports import parse_score, parse_total_time
+from .rollups import apply_status_changes, latest_attempts
+
+logger = logging.getLogger(__name__)
+
+STATUS_URL = "https://cloudscorm.cloudnuv.com/user-status"
+REPORT_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# The fields that identify one attempt, and the ones a newer report overwrites
+STATUS_KEY_FIELDS = ["client_user", "_scorm_id", "attempt"]
+STATUS_UPDATE_FIELDS = [
+    "scorm_name",
+    "complete_status",
+    "satisfied_status",
+    "total_time",
+    "score",
+    "score_value",
+    "total_seconds",
+    "created_at",
+    "updated_at",
+    "synced_at",
+]
+
+
+class StatusFetchError(Exception):
+    pass
+
+
+def fetch_reports(cloudscorm_user_id, scorm_id) -> list:
+    """
+    Fetches a learner's attempt reports for a SCORM package from CloudScorm.
+
+    Raises:
+        StatusFetchError: If CloudScorm does not answer with a 200.
+    """
+    response = http_client.post(
+        STATUS_URL,
+        params={"user_id": cloudscorm_user_id, "scorm_id": scorm_id},
+        headers={"Authorization": f"Bearer {settings.API_TOKEN1}"},
+        idempotent=True,
+    )
+    if response.status_code != 200:
+        raise StatusFetchError(f"CloudScorm answered {response.status_code}")
+    return response.json().get("reports", [])
+
+
+def parse_report_datetime(value):
+    return timezone.make_aware(datetime.strptime(value, REPORT_DATETIME_FORMAT))
+
+
+def build_status(client_user_id, report) -> UserScormStatus:
+    """
+    Builds an unsaved UserScormStatus from a CloudScorm attempt report.
+    """
+    return UserScormStatus(
+        client_user_id=client_user_id,
+        _scorm_id=str(report["id"]),
+        scorm_name=report["scormname"],
+        attempt=int(report["attempt"]),
+        complete_status=report["complete_status"],
+        satisfied_status=report["satisfied_status"],
+        total_time=report["total_time"],
+        score=report["score"],
+        score_value=parse_score(report["score"]),
+        total_seconds=parse_total_time(report["total_time"]),
+        created_at=parse_report_datetime(report["created_at"]),
+        updated_at=parse_report_datetime(report["updated_at"]),
+        synced_at=timezone.now(),
+    )
+
+
+def _fetch_learner_statuses(learner):
+    client_user_id, cloudscorm_user_id, scorm_id = learner
+    try:
+        reports = fetch_reports(cloudscorm_user_id, scorm_id)
+        return [build_status(client_user_id, report) for report in reports]
+    except Exception:
+        logger.warning(f"Could not fetch status of learner {client_user_id} for SCORM {scorm_id}", exc_info=True)
+        return None
+
+
+def fetch_statuses(learners, max_workers) -> list:
+    """
+    Fetches the reports of many learners from CloudScorm concurrently.
+
+    Args:
+        learners (list): (client_user_id, cloudscorm_user_id, CloudScorm scorm_id) tuples.
+        max_workers (int): The most requests to CloudScorm in flight at once.
+
+    Returns:
+        list: For each learner, in order, their unsaved statuses, or None if the fetch failed.
+    """
+    if not learners:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(learners))) as executor:
+        return list(executor.map(_fetch_learner_statuses, learners))
+
+
+def latest_stored_status(client_user_id, scorm):
+    """
+    Returns the stored status of the learner's latest attempt at a SCORM package, if any.
+    """
+    return (
+        UserScormStatus.objects.filter(client_user_id=client_user_id, _scorm_id=str(scorm.scorm_id))
+        .order_by("-attempt")
+        .first()
+    )
+
+
+def latest_stored_statuses(client_user_ids, scorm) -> dict:
+    """
+    Returns the stored status of each learner's latest attempt at a SCORM package.
+
+    Returns:
+        dict: The latest UserScormStatus by client_user_id, for learners that have one.
+    """
+    latest = {}
+    statuses = UserScormStatus.objects.filter(
+        client_user_id__in=client_user_ids, _scorm_id=str(scorm.scorm_id)
+    ).order_by("client_user_id", "-attempt")
+    for status in statuses.iterator():
+        latest.setdefault(status.client_user_id, status)
+    return latest
+
+
+def is_fresh(status, now=None) -> bool:
+    """
+    Whether a stored status was synced from CloudScorm less than STATUS_FRESH_TTL seconds ago.
+    """
+    if status.synced_at is None:
+        return False
+    now = now or timezone.now()
+    return (now - status.synced_at).total_seconds() < settings.STATUS_FRESH_TTL
+
+
+def refresh_status(client_user, scorm):
+    """
+    Pulls a learner's reports for a SCORM package from CloudScorm and stores every attempt.
+
+    Returns:
+        UserScormStatus: The status of the latest attempt, or None if there are no reports.
+
+    Raises:
+        StatusFetchError: If CloudScorm does not answer with a 200.
+    """
+    reports = fetch_reports(client_user.cloudscorm_user_id, scorm.scorm_id)
+    logger.info(f"Reports: {reports}")
+    if not reports:
+        return None
+    statuses = [build_status(client_user.id, report) for report in reports]
+    upsert_statuses(statuses)
+    return max(statuses, key=lambda status: status.attempt)
+
+
+def serialize_status(status, client_user) -> dict:
+    """
+    Returns the JSON representation of a learner's status served to LMS integrations.
+    """
+    return {
+        "learner_id": client_user.cloudscorm_user_id,
+        "learner_name": client_user.first_name,
+        "learner_email": client_user.email,
+        "scorm_id": status._scorm_id,
+        "scorm_name": status.scorm_name,
+        "complete_status": status.complete_status,
+        "satisfied_status": status.satisfied_status,
+        "total_time": status.total_time,
+        "score": status.score,
+        "attempt": status.attempt,
+        "created_at": timezone.localtime(status.created_at).strftime(REPORT_DATETIME_FORMAT),
+        "updated_at": timezone.localtime(status.updated_at).strftime(REPORT_DATETIME_FORMAT),
+    }
+
+
+def upsert_statuses(statuses, batch_size=500) -> list:
+    """
+    Inserts the statuses, overwriting the stored row of any attempt that already exists.
+
+    Only the last status given for an attempt is written, since one INSERT ... ON
+    CONFLICT cannot update the same row twice. The progress rollups of the learners
+    whose latest attempt changed are updated in the same transaction. The learners'
+    rows are locked first, so concurrent upserts for the same learner, such as a
+    webhook ingest and a poll, take turns and never count an attempt twice.
+    """
+    latest = {}
+    for status in statuses:
+        latest[(status.client_user_id, status._scorm_id, status.attempt)] = status
+    if not latest:
+        return []
+
+    with transaction.atomic():
+        list(
+            ClientUser.objects.select_for_update()
+            .filter(id__in={client_user_id for client_user_id, _, _ in latest})
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        previous = latest_attempts(latest.values())
+        written = UserScormStatus.objects.bulk_create(
+            latest.values(),
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=STATUS_KEY_FIELDS,
+            update_fields=STATUS_UPDATE_FIELDS,
+        )
+        apply_status_changes(previous, written)
+    return written
+
+
+def parse_status_event(event) -> StatusEvent:
+    """
+    Builds an unsaved StatusEvent from a pushed event.
+
+    An event is a CloudScorm attempt report with the learner's CloudScorm "user_id" added.
+
+    Raises:
+        ValueError: If the event is not a valid report.
+    """
+    try:
+        # Build the status once to check that every report field is present and well formed
+        status = build_status(None, event)
+        return StatusEvent(
+            cloudscorm_user_id=str(event["user_id"]),
+            scorm_id=status._scorm_id,
+            attempt=status.attempt,
+            updated_at=status.updated_at,
+            payload=event,
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid status event: {e!r}")
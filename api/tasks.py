@@ -0,0 +1,218 @@
+import logging
+from collections import defaultdict
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from clients.models import Client, ClientUser, UserScormStatus
+from scorm.models import ScormAsset, UserScormMapping
+
+from .models import StatusEvent, StatusSyncCursor
+from .status import build_status, fetch_statuses, refresh_status, upsert_statuses
+
+logger = logging.getLogger(__name__)
+
+
+def active_mappings(client_id, now):
+    """
+    Returns the client's mappings whose assignment is within its validity window and
+    whose learner has been provisioned on CloudScorm, in ID order.
+    """
+    return (
+        UserScormMapping.objects.filter(
+            assignment__client_id=client_id,
+            user__cloudscorm_user_id__isnull=False,
+        )
+        .filter(Q(assignment__validity_start_date__isnull=True) | Q(assignment__validity_start_date__lte=now))
+        .filter(Q(assignment__validity_end_date__isnull=True) | Q(assignment__validity_end_date__gte=now))
+        .order_by("id")
+    )
+
+
+@shared_task
+def sync_learner_statuses():
+    """
+    Queues a status sync for every client.
+    """
+    for client_id in Client.objects.values_list("id", flat=True):
+        sync_client_statuses.delay(client_id)
+
+
+@shared_task
+def sync_client_statuses(client_id):
+    """
+    Pulls the CloudScorm reports of a client's active learners into UserScormStatus.
+
+    Mappings are walked in chunks of STATUS_SYNC_CHUNK_SIZE, resuming from the client's
+    StatusSyncCursor. The reports of each chunk are fetched concurrently, at most
+    STATUS_SYNC_CONCURRENCY at a time, and every attempt is written in one bulk upsert.
+    A run stops after STATUS_SYNC_MAX_PER_RUN mappings and the next one carries on from
+    there; once the end is reached the cursor goes back to the start.
+
+    Args:
+        client_id (int): The ID of the client to sync.
+
+    Returns:
+        int: The number of mappings synced.
+    """
+    lock_key = f"status-sync:{client_id}"
+    if not cache.add(lock_key, 1, settings.STATUS_SYNC_LOCK_TIMEOUT):
+        logger.info(f"Status sync for client {client_id} is already running")
+        return 0
+
+    try:
+        cursor, _ = StatusSyncCursor.objects.get_or_create(client_id=client_id)
+        now = timezone.now()
+        mappings = active_mappings(client_id, now).values_list(
+            "id", "user_id", "user__cloudscorm_user_id", "assignment__scorm_asset__scorm_id"
+        )
+
+        synced = 0
+        while synced < settings.STATUS_SYNC_MAX_PER_RUN:
+            chunk = list(mappings.filter(id__gt=cursor.last_mapping_id)[: settings.STATUS_SYNC_CHUNK_SIZE])
+            if not chunk:
+                cursor.last_mapping_id = 0
+                cursor.last_completed_at = now
+                cursor.save()
+                break
+
+            fetched = fetch_statuses([learner for _, *learner in chunk], settings.STATUS_SYNC_CONCURRENCY)
+            upsert_statuses(status for learner_statuses in fetched for status in learner_statuses or ())
+
+            cursor.last_mapping_id = chunk[-1][0]
+            cursor.save(update_fields=["last_mapping_id", "updated_at"])
+            synced += len(chunk)
+
+        logger.info(f"Synced {synced} learner statuses for client {client_id}")
+        return synced
+    finally:
+        cache.delete(lock_key)
+
+
+def refresh_lock_key(client_user_id, scorm_asset_id) -> str:
+    return f"status-refresh:{client_user_id}:{scorm_asset_id}"
+
+
+@shared_task
+def refresh_learner_status(client_user_id, scorm_asset_id):
+    """
+    Refreshes a learner's stored status for a SCORM package in the background.
+    """
+    try:
+        client_user = ClientUser.objects.get(pk=client_user_id)
+        scorm = ScormAsset.objects.get(pk=scorm_asset_id)
+        refresh_status(client_user, scorm)
+    finally:
+        cache.delete(refresh_lock_key(client_user_id, scorm_asset_id))
+
+
+def schedule_status_refresh(client_user_id, scorm_asset_id):
+    """
+    Queues a background refresh unless one is already queued for the learner and package.
+    """
+    if cache.add(refresh_lock_key(client_user_id, scorm_asset_id), 1, settings.STATUS_REFRESH_LOCK_TIMEOUT):
+        refresh_learner_status.delay(client_user_id, scorm_asset_id)
+
+
+INGEST_LOCK_KEY = "status-ingest:scheduled"
+
+
+def schedule_status_ingest():
+    """
+    Queues a drain of the status event inbox, unless one is already waiting.
+
+    The drain is delayed by STATUS_INGEST_DELAY seconds so that the events pushed in
+    the meantime are written together.
+    """
+    if cache.add(INGEST_LOCK_KEY, 1, settings.STATUS_INGEST_DELAY * 10):
+        ingest_status_events.apply_async(countdown=settings.STATUS_INGEST_DELAY)
+
+
+def _ingest_batch(events):
+    # Several events for one attempt collapse into the most recent one
+    latest = {}
+    for event in events:
+        key = (event.cloudscorm_user_id, event.scorm_id, event.attempt)
+        if key not in latest or event.updated_at > latest[key].updated_at:
+            latest[key] = event
+
+    client_user_ids = defaultdict(list)
+    for client_user_id, cloudscorm_user_id in ClientUser.objects.filter(
+        cloudscorm_user_id__in={event.cloudscorm_user_id for event in latest.values()}
+    ).values_list("id", "cloudscorm_user_id"):
+        client_user_ids[cloudscorm_user_id].append(client_user_id)
+
+    statuses = [
+        build_status(client_user_id, event.payload)
+        for event in latest.values()
+        for client_user_id in client_user_ids[event.cloudscorm_user_id]
+    ]
+
+    # Skip events that are not newer than what is stored, so redelivery changes nothing
+    stored = {
+        (client_user_id, scorm_id, attempt): updated_at
+        for client_user_id, scorm_id, attempt, updated_at in UserScormStatus.objects.filter(
+            client_user_id__in={status.client_user_id for status in statuses},
+            _scorm_id__in={status._scorm_id for status in statuses},
+        ).values_list("client_user_id", "_scorm_id", "attempt", "updated_at")
+    }
+    statuses = [
+        status
+        for status in statuses
+        if stored.get((status.client_user_id, status._scorm_id, status.attempt)) is None
+        or status.updated_at > stored[(status.client_user_id, status._scorm_id, status.attempt)]
+    ]
+    upsert_statuses(statuses)
+    return len(statuses)
+
+
+def _record_failure(event, error, now):
+    event.failures += 1
+    event.last_error = repr(error)
+    if event.failures >= settings.STATUS_INGEST_MAX_FAILURES:
+        event.dead_at = now
+        logger.error(f"Dead-lettered status event {event.pk} after {event.failures} failures: {error!r}")
+    event.save(update_fields=["failures", "last_error", "dead_at"])
+
+
+@shared_task
+def ingest_status_events():
+    """
+    Writes the queued status events to UserScormStatus in batches of STATUS_INGEST_BATCH_SIZE.
+
+    When a batch fails, its events are written one at a time so that one bad event
+    does not hold back the others. The events that still fail stay queued for the next
+    drain and are dead-lettered once they have failed STATUS_INGEST_MAX_FAILURES times.
+
+    Returns:
+        int: The number of statuses written.
+    """
+    cache.delete(INGEST_LOCK_KEY)
+    written = 0
+    last_id = 0
+    queued = StatusEvent.objects.filter(dead_at__isnull=True).order_by("id")
+    while True:
+        events = list(queued.filter(id__gt=last_id)[: settings.STATUS_INGEST_BATCH_SIZE])
+        if not events:
+            break
+        last_id = events[-1].id
+
+        try:
+            written += _ingest_batch(events)
+            done = events
+        except Exception:
+            logger.exception(f"Could not ingest a batch of {len(events)} status events; retrying them one by one")
+            done = []
+            now = timezone.now()
+            for event in events:
+                try:
+                    written += _ingest_batch([event])
+                    done.append(event)
+                except Exception as e:
+                    _record_failure(event, e, now)
+        StatusEvent.objects.filter(id__in=[event.id for event in done]).delete()
+    logger.info(f"Ingested {written} pushed learner statuses")
+    return written
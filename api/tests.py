@@ -1,3 +1,248 @@
-from django.test import TestCase
+import os
+import pickle
+import re
+import tempfile
+import zipfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from clients.models import Client, ClientUser, UserScormStatus
+from scorm.models import ScormAsset, ScormAssignment, UserScormMapping
+
+from .cache import authorization_cache, get_assignment, get_client
+from .reports import TOTAL_SECONDS_LIMIT, parse_total_time
+
+CLIENTS = 20
+ASSETS = 50
+LEARNERS_PER_CLIENT = 1000
+
+# How each backend reports a table read through an index rather than a full scan
+INDEX_SCAN = {
+    "postgresql": r"Index (Only )?Scan .*\bon {table}\b|Bitmap Heap Scan on {table}\b",
+    "sqlite": r"SEARCH {table} USING (COVERING )?INDEX",
+}
+FULL_SCAN = {
+    "postgresql": r"Seq Scan on {table}\b",
+    "sqlite": r"SCAN {table}\b",
+}
+
+
+class HotLookupQueryPlanTests(TestCase):
+    """
+    Checks that the lookups made on every launch and status request are served by an index.
+
+    A large dataset is seeded so that the planner, given fresh statistics, only picks
+    an index when one actually fits the query.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        clients = Client.objects.bulk_create(
+            Client(first_name=f"Client {i}", email=f"client{i}@example.com", company=f"Company {i}")
+            for i in range(CLIENTS)
+        )
+        assets = ScormAsset.objects.bulk_create(
+            ScormAsset(title=f"Course {i}", description="", scorm_id=i + 1, scorm_file="course.zip")
+            for i in range(ASSETS)
+        )
+        assignments = ScormAssignment.objects.bulk_create(
+            ScormAssignment(client=client, scorm_asset=asset, number_of_seats=LEARNERS_PER_CLIENT)
+            for client in clients
+            for asset in assets
+        )
+        learners = ClientUser.objects.bulk_create(
+            (
+                ClientUser(learner_id=f"learner-{i}", client=client, cloudscorm_user_id=f"{client.pk}-{i}")
+                for client in clients
+                for i in range(LEARNERS_PER_CLIENT)
+            ),
+            batch_size=1000,
+        )
+        assignments_by_client = {}
+        for assignment in assignments:
+            assignments_by_client.setdefault(assignment.client_id, []).append(assignment)
+        mappings = [
+            UserScormMapping(user=learner, assignment=assignment)
+            for i, learner in enumerate(learners)
+            for assignment in assignments_by_client[learner.client_id][i % 5 :: 10]
+        ]
+        UserScormMapping.objects.bulk_create(mappings, batch_size=1000)
+        UserScormStatus.objects.bulk_create(
+            (
+                UserScormStatus(
+                    client_user_id=mapping.user_id,
+                    _scorm_id=str(mapping.assignment.scorm_asset.scorm_id),
+                    attempt=attempt,
+                    created_at=now,
+                    updated_at=now,
+                )
+                for mapping in mappings[::4]
+                for attempt in (1, 2)
+            ),
+            batch_size=1000,
+        )
+
+        cls.client_obj = clients[CLIENTS // 2]
+        cls.asset = assets[ASSETS // 2]
+        cls.learner = ClientUser.objects.get(learner_id="learner-500", client=cls.client_obj)
+        cls.assignment = ScormAssignment.objects.get(client=cls.client_obj, scorm_asset=cls.asset)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, model):
+        vendor = connection.vendor
+        if vendor not in INDEX_SCAN:
+            self.skipTest(f"No query plan expectations for {vendor}")
+
+        table = re.escape(model._meta.db_table)
+        plan = queryset.explain()
+        self.assertRegex(plan, INDEX_SCAN[vendor].format(table=table))
+        self.assertNotRegex(plan, FULL_SCAN[vendor].format(table=table))
+
+    def test_client_user_by_learner_and_client(self):
+        self.assertUsesIndex(
+            ClientUser.objects.filter(learner_id=self.learner.learner_id, client=self.client_obj),
+            ClientUser,
+        )
+
+    def test_client_user_by_learner(self):
+        self.assertUsesIndex(ClientUser.objects.filter(learner_id=self.learner.learner_id), ClientUser)
+
+    def test_client_user_by_cloudscorm_user(self):
+        self.assertUsesIndex(
+            ClientUser.objects.filter(cloudscorm_user_id__in=[self.learner.cloudscorm_user_id]),
+            ClientUser,
+        )
+
+    def test_assignment_by_client_and_asset(self):
+        self.assertUsesIndex(
+            ScormAssignment.objects.filter(client=self.client_obj, scorm_asset=self.asset),
+            ScormAssignment,
+        )
+
+    def test_mapping_by_user_and_assignment(self):
+        self.assertUsesIndex(
+            UserScormMapping.objects.filter(user=self.learner, assignment=self.assignment),
+            UserScormMapping,
+        )
+
+    def test_latest_status_by_learner_and_scorm(self):
+        self.assertUsesIndex(
+            UserScormStatus.objects.filter(
+                client_user=self.learner, _scorm_id=str(self.asset.scorm_id)
+            ).order_by("-attempt"),
+            UserScormStatus,
+        )
+
+
+class AuthorizationCacheTests(TestCase):
+    def setUp(self):
+        self.client_record = Client.objects.create(
+            first_name="Acme",
+            email="acme@example.com",
+            company="Acme",
+            lms_api_key="key-1234",
+            lms_api_secret="secret-5678",
+        )
+        self.asset = ScormAsset.objects.create(title="Course", description="", scorm_id=42, scorm_file="course.zip")
+        self.assignment = ScormAssignment.objects.create(
+            client=self.client_record, scorm_asset=self.asset, number_of_seats=1
+        )
+        authorization_cache.invalidate()
+
+    def test_assignment_entry(self):
+        assignment = get_assignment(self.client_record.pk, self.asset.pk)
+        self.assertEqual(assignment.pk, self.assignment.pk)
+        self.assertEqual(assignment.client.id, self.client_record.pk)
+        self.assertEqual((assignment.scorm_asset.scorm_id, assignment.scorm_asset.title), (42, "Course"))
+        self.assertIsNone(get_assignment(self.client_record.pk, self.asset.pk + 1))
+
+    def test_client_credentials_are_not_cached(self):
+        get_client(self.client_record.pk)
+        get_assignment(self.client_record.pk, self.asset.pk)
+
+        version = authorization_cache.current_version()
+        entries = cache.get_many(
+            [
+                f"authz:{version}:client:{self.client_record.pk}",
+                f"authz:{version}:assignment:{self.client_record.pk}:{self.asset.pk}",
+            ]
+        )
+        self.assertEqual(len(entries), 2)
+        for entry in entries.values():
+            self.assertNotIn(b"key-1234", pickle.dumps(entry))
+            self.assertNotIn(b"secret-5678", pickle.dumps(entry))
+
+
+class ScormDataTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        template = os.path.join(directory.name, "template.zip")
+        with zipfile.ZipFile(template, "w") as archive:
+            archive.writestr("scorm-wrapper/configuration.js", 'var config = { launchID: "{{ ID }}" };')
+        settings_override = override_settings(MEDIA_ROOT=directory.name, SCORM_WRAPPER_TEMPLATE=template)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        client = Client.objects.create(first_name="Acme", email="acme@example.com", company="Acme")
+        self.asset = ScormAsset.objects.create(title="Course", description="", scorm_id=42, scorm_file="course.zip")
+        self.assignment = ScormAssignment.objects.create(client=client, scorm_asset=self.asset, number_of_seats=1)
+
+    def test_wrapper_is_built_for_an_assignment_without_one(self):
+        self.assertFalse(self.assignment.client_scorm_file)
+
+        response = self.client.get(reverse("get_scorm_data", args=[self.assignment.client_id, self.asset.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assignment.refresh_from_db()
+        self.assertEqual(self.assignment.wrapper_status, ScormAssignment.WRAPPER_READY)
+        self.assertTrue(default_storage.exists(self.assignment.client_scorm_file.name))
+        self.assertEqual(
+            response.json()["modules"][0]["file"],
+            f"http://testserver{self.assignment.client_scorm_file.url}",
+        )
+
+
+class BatchUserScormStatusValidationTests(SimpleTestCase):
+    def post(self, body):
+        return self.client.post(reverse("batch_user_scorm_status"), body, content_type="application/json")
+
+    def test_malformed_bodies_are_rejected(self):
+        for body in (
+            [],
+            "launch",
+            {"id": ["launch"], "referringurl": "lms.example.com", "learner_ids": ["a"]},
+            {"id": "launch", "referringurl": {"host": "x"}, "learner_ids": ["a"]},
+            {"id": "launch", "referringurl": "lms.example.com", "learner_ids": "a"},
+            {"id": "launch", "referringurl": "lms.example.com", "learner_ids": ["a", 1]},
+            {"id": "launch", "referringurl": "lms.example.com", "learner_ids": [{"id": "a"}]},
+        ):
+            with self.subTest(body=body):
+                self.assertEqual(self.post(body).status_code, 400)
+
+
+class ParseTotalTimeTests(SimpleTestCase):
+    def test_scorm_12_time(self):
+        self.assertEqual(parse_total_time("0001:30:05.25"), 5405)
+
+    def test_iso_duration(self):
+        self.assertEqual(parse_total_time("P1DT2H"), 93600)
+
+    def test_unreadable_time(self):
+        for value in ("", "P", "PT", "1:2", "01:75:00", "soon"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_total_time(value))
+
+    def test_time_beyond_the_column_is_dropped(self):
+        self.assertEqual(parse_total_time(f"PT{TOTAL_SECONDS_LIMIT}S"), TOTAL_SECONDS_LIMIT)
+        for value in ("P99999D", "P99999999D", f"P{'9' * 400}D", "99999999:00:00"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_total_time(value))
@@ -29,4 +29,6 @@ urlpatterns = [
     path('get_scorm_data/<int:client_id>/<int:scorm_id>/', views.get_scorm_data, name='get_scorm_data'),
     path('sync_courses/', views.sync_courses, name='sync_courses'),
     path('user_scorm_status/', views.user_scorm_status, name='user_scorm_status'),
+    path('user_scorm_status/batch/', views.batch_user_scorm_status, name='batch_user_scorm_status'),
+    path('webhooks/status/', views.status_webhook, name='status_webhook'),
 ]
@@ -1,62 +1,14 @@
+import hashlib
+import hmac
 import requests
 import logging
 
-from django.db.models import Count
-from django.utils import timezone
 from django.conf import settings
-from scorm.models import ScormAssignment, UserScormMapping
-from clients.models import Client
+from my_scorm_project.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
 
-def check_assigned_scorm_validity(client_id, scorm_id) -> bool:
-    # Get the client
-    try:
-        client = Client.objects.get(id=client_id)
-    except Client.DoesNotExist:
-        return False
-
-    # Get the ScormAssignment for the client and the scorm_id
-    try:
-        assignment = ScormAssignment.objects.get(
-            client=client, scorm_asset__id=scorm_id
-        )
-    except ScormAssignment.DoesNotExist:
-        return False
-
-    # Check if the current date is within the validity period of the assignment
-    if assignment.validity_start_date <= timezone.now() <= assignment.validity_end_date:
-        return True
-    else:
-        return False
-
-
-def check_assigned_scorm_seats_limit(client_id, scorm_id) -> bool:
-    # Get the client
-    try:
-        client = Client.objects.get(id=client_id)
-    except Client.DoesNotExist:
-        return False
-
-    # Get the ScormAssignment for the client and the scorm_id
-    try:
-        assignment = ScormAssignment.objects.get(
-            client=client, scorm_asset__id=scorm_id
-        )
-    except ScormAssignment.DoesNotExist:
-        return False
-
-    # Get the count of UserScormMapping for the assignment
-    mapping_count = UserScormMapping.objects.filter(assignment=assignment).count()
-
-    # Check if the count of UserScormMapping is less than or equal to the number of seats
-    if mapping_count <= assignment.number_of_seats:
-        return True
-    else:
-        return False
-
-
 def create_user_on_cloudscorm(learner_id, bearer_token, **kwargs) -> dict:
     api_url = "https://cloudscorm.cloudnuv.com/user/signup"
     payload = {
@@ -69,7 +21,7 @@ def create_user_on_cloudscorm(learner_id, bearer_token, **kwargs) -> dict:
     headers = {"Authorization": f"Bearer {bearer_token}"}
 
     try:
-        response = requests.post(api_url, data=payload, headers=headers)
+        response = http_client.post(api_url, data=payload, headers=headers)
         response.raise_for_status()
         cloudscorm_user_data = response.json()
 
@@ -90,3 +42,17 @@ def construct_launch_url(scorm_id, cloudscorm_user_id) -> str:
     base_url = "https://cloudscorm.cloudnuv.com/course/"
     launch_url = f"{base_url}{scorm_id}/{cloudscorm_user_id}/online/0-0-0-0-0"
     return launch_url
+
+
+def verify_webhook_signature(body, signature) -> bool:
+    """
+    Checks the X-Webhook-Signature header of a pushed status event.
+
+    The header must be "sha256=" followed by the hex HMAC-SHA256 of the raw request
+    body under STATUS_WEBHOOK_SECRET. Every request is refused while no secret is set.
+    """
+    secret = settings.STATUS_WEBHOOK_SECRET
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature[len("sha256="):], expected)
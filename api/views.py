@@ -1,6 +1,5 @@
 import logging
 import json
-import requests
 import base64
 import time
 import random
@@ -23,28 +22,59 @@ from rest_framework.decorators import (
 )
 from urllib.parse import urlparse
 from django.conf import settings
+from my_scorm_project.http_client import http_client
 from drf_yasg.utils import swagger_auto_schema
 
 from clients.models import Client, ClientUser, UserScormStatus
+from clients.tasks import schedule_cloudscorm_provisioning
 from scorm.models import ScormAsset, ScormAssignment, ScormResponse, UserScormMapping, Course, Module
-from scorm.utils import decrypt_data
+from scorm.packaging import WrapperBuildTimeout, ensure_assignment_wrapper
+from scorm.tokens import ExpiredLaunchToken, read_launch_id
 from api.serializers import (
     ClientSerializer,
     ClientUserSerializer,
     ValidateAndLaunchRequest,
     ValidateAndLaunchResponse,
 )
-from .utils import (
-    check_assigned_scorm_validity,
-    create_user_on_cloudscorm,
-    construct_launch_url,
-    check_assigned_scorm_seats_limit,
+from .cache import get_assignment, get_domain_allowlist
+from .launch import decide_launch
+from .status import (
+    StatusFetchError,
+    fetch_statuses,
+    is_fresh,
+    latest_stored_status,
+    latest_stored_statuses,
+    parse_status_event,
+    refresh_status,
+    serialize_status,
+    upsert_statuses,
 )
+from .models import StatusEvent
+from .tasks import schedule_status_ingest, schedule_status_refresh
+from .utils import construct_launch_url, verify_webhook_signature
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 from django.views.decorators.clickjacking import xframe_options_exempt
 
 logger = logging.getLogger(__name__)
 
+def wait_for_cloudscorm_user(client_user_id):
+    """
+    Polls for a learner's CloudScorm user ID for up to CLOUDSCORM_PROVISION_WAIT seconds.
+
+    Returns:
+        str: The CloudScorm user ID, or None if the learner is not provisioned yet.
+    """
+    deadline = time.monotonic() + settings.CLOUDSCORM_PROVISION_WAIT
+    while True:
+        cloudscorm_user_id = (
+            ClientUser.objects.filter(pk=client_user_id).values_list("cloudscorm_user_id", flat=True).first()
+        )
+        if cloudscorm_user_id or time.monotonic() >= deadline:
+            return cloudscorm_user_id
+        time.sleep(0.25)
+
+
 # @swagger_auto_schema(
 #     method="post",
 #     request_body=ValidateAndLaunchRequest,
@@ -94,67 +124,64 @@ def validate_and_launch(request):
         logger.error('Missing required data')
         return JsonResponse({"error": "Missing required data"}, status=400)
 
-    # Decrypt the ID
-    decrypted_id = decrypt_data(encrypted_id)
-
-    # Split the decrypted ID to get the client ID and the SCORM ID
-    client_id, scorm_id = decrypted_id.split("-")
-    
-    # Get the client
+    # Read the client ID and the SCORM ID from the signed token or legacy ID
     try:
-        client = Client.objects.get(id=client_id)
-    except Client.DoesNotExist:
+        client_id, scorm_id, _ = read_launch_id(encrypted_id)
+    except ExpiredLaunchToken:
+        logger.info("License invalid")
+        return JsonResponse({"error": "License invalid"}, status=400)
+    except ValueError:
         logger.error('Invalid client identifier')
         return JsonResponse({"error": "Invalid client identifier"}, status=400)
 
-    # Get the domain of the referring URL
-    referring_domain = referring_url
-    
-    # Get the list of valid domains for the client
-    valid_domains = client.domains.split(",")
+    # Check the client, referring domain and license
+    decision = decide_launch(client_id, scorm_id, referring_url, learner_id)
+    if not decision.allowed:
+        logger.info(decision.error)
+        return JsonResponse({"error": decision.error}, status=decision.status)
 
-    # Check if the referring domain is in the list of valid domains for the client
-    if referring_domain not in valid_domains:
-        logger.info("Invalid referring domain")
-        return JsonResponse({"error": "Invalid referring domain"}, status=400)
+    # Serve repeat launches from the launch URL stored on the learner's seat
+    if decision.launch_url:
+        return JsonResponse({'launch_url': decision.launch_url})
 
-    # Check if the SCORM assignment is valid
-    if not check_assigned_scorm_validity(client_id, scorm_id):
-        logger.info("License invalid")
-        return JsonResponse({"error": "License invalid"}, status=400)
+    # Find or Create the ClientUser
+    if decision.client_user_id:
+        client_user = ClientUser(
+            id=decision.client_user_id,
+            learner_id=learner_id,
+            client_id=decision.client.id,
+            cloudscorm_user_id=decision.cloudscorm_user_id,
+        )
+    else:
+        client_user, _ = ClientUser.objects.get_or_create(
+            learner_id=learner_id, client_id=decision.client.id, defaults={"first_name": learner_name}
+        )
 
-    # Check if the SCORM assignment seats limit is not exceeded
-    if not check_assigned_scorm_seats_limit(client_id, scorm_id):
+    # Claim a seat and create the UserScormMapping
+    if not decision.has_seat and not ScormAssignment(pk=decision.assignment.pk).claim_seat(client_user):
         logger.info("Seats limit exceeded")
         return JsonResponse({"error": "Seats limit exceeded"}, status=400)
 
-    # Find or Create the ClientUser
-    client_user, _ = ClientUser.objects.get_or_create(
-        learner_id=learner_id, client=client, defaults={"first_name": learner_name}
-    )
-
-    # CloudScorm Sync
-    bearer_token = settings.API_TOKEN1
+    # CloudScorm Sync, unless the learner was already provisioned in the background
     if not client_user.cloudscorm_user_id:
-        cloudscorm_user_data = create_user_on_cloudscorm(learner_id, bearer_token)
-        logger.info(f'CloudScorm User Data: {cloudscorm_user_data}')
-        client_user.cloudscorm_user_id = cloudscorm_user_data["user_id"]
-        client_user.save()
-        
-    scorm_asset = get_object_or_404(ScormAsset, id=scorm_id)
-    assignment = get_object_or_404(ScormAssignment, scorm_asset=scorm_asset)
+        schedule_cloudscorm_provisioning(client_user.id)
+        client_user.cloudscorm_user_id = wait_for_cloudscorm_user(client_user.id)
+        if not client_user.cloudscorm_user_id:
+            logger.info("CloudScorm provisioning still in progress")
+            response = JsonResponse({"error": "Learner provisioning in progress"}, status=503)
+            response["Retry-After"] = "5"
+            return response
 
-    # Create a UserScormMapping  
-    UserScormMapping.objects.get_or_create(
-        user=client_user, 
-        assignment=assignment
-    )
+    scorm_asset = decision.scorm_asset
 
     # Construct the launch URL
     launch_url = construct_launch_url(scorm_asset.scorm_id, client_user.cloudscorm_user_id)
 
     # Return the launch URL
     if launch_url:
+        UserScormMapping.objects.filter(user=client_user, assignment_id=decision.assignment.pk).update(
+            launch_url=launch_url
+        )
         return JsonResponse({'launch_url': launch_url})
     else:
         logger.info("Failed to generate launch URL")
@@ -162,8 +189,12 @@ def validate_and_launch(request):
     
 def get_scorm_data(request, client_id, scorm_id):
     try:
-        assignment = ScormAssignment.objects.get(client_id=client_id, scorm_asset_id=scorm_id)
+        assignment = ScormAssignment.objects.select_related("client", "scorm_asset").get(
+            client_id=client_id, scorm_asset_id=scorm_id
+        )
         scorm = assignment.scorm_asset
+        # Wrappers are built on first use, so this assignment may not have one yet
+        ensure_assignment_wrapper(assignment)
         data = {
             "course_title": scorm.title,
             "course_code": str(int(time.time())) + str(random.randint(100, 999)),  # Add course_code here
@@ -176,6 +207,11 @@ def get_scorm_data(request, client_id, scorm_id):
     except ScormAssignment.DoesNotExist:
         logger.exception("Scorm assignment not found")
         return JsonResponse({"error": "Scorm assignment not found"}, status=404)
+    except WrapperBuildTimeout:
+        logger.info("SCORM wrapper still being built")
+        response = JsonResponse({"error": "The SCORM package is still being prepared"}, status=503)
+        response["Retry-After"] = "10"
+        return response
     except Exception as e:
         logger.exception("An error occurred")
         return JsonResponse({"error": str(e)}, status=400)
@@ -246,7 +282,7 @@ def sync_courses(request):
             data.pop('scormId', None)
 
             logger.info(f"Sync courses request data: {data}")
-            response = requests.post(lms_url, headers=headers, data=json.dumps(data))
+            response = http_client.post(lms_url, headers=headers, data=json.dumps(data))
 
             if response.status_code in [200, 201]:
                 course.syncing_status = True
@@ -271,8 +307,7 @@ def user_scorm_status(request):
         id = request.GET.get('id')
         logger.info(f"ID: {id}")
 
-        decoded_id = base64.b64decode(id).decode()
-        client_id, scorm_id = decoded_id.split('-')
+        client_id, scorm_id, _ = read_launch_id(id, check_validity=False)
         logger.info(f"Client ID: {client_id}, SCORM ID: {scorm_id}")
 
         learner_id = request.GET.get('learner_id')
@@ -281,77 +316,180 @@ def user_scorm_status(request):
         referringurl = request.GET.get('referringurl')
         logger.info(f"Referring URL: {referringurl}")
 
+        # assignment
+        assignment = get_assignment(client_id, scorm_id)
+        if assignment is None:
+            logger.error("Scorm assignment not found")
+            return JsonResponse({"error": "Scorm assignment not found"}, status=404)
+
         # scorm
-        scorm = ScormAsset.objects.get(id=scorm_id)
+        scorm = assignment.scorm_asset
         logger.info(f"SCORM: {scorm}, Title: {scorm.title}")
 
-        # learner
-        client_user = ClientUser.objects.get(learner_id=learner_id)
-        logger.info(f"Client User: {client_user}, Name: {client_user.first_name}")
-
         # client
-        client = client_user.client
+        client = assignment.client
         logger.info(f"Client: {client}, Name: {client.first_name}")
 
-        if client.domains != referringurl:
+        if not get_domain_allowlist(client.id).allows(referringurl):
             logger.error("Invalid referring URL")
             return JsonResponse({"error": "Invalid referring URL"}, status=400)
 
-        headers = {'Authorization': f'Bearer {settings.API_TOKEN1}'}
-        url = f"https://cloudscorm.cloudnuv.com/user-status?user_id={client_user.cloudscorm_user_id}&scorm_id={scorm.scorm_id}"
-        response = requests.post(url, headers=headers)
-
-        if response.status_code == 200:
-            data = response.json()
-            reports = data.get('reports', [])
-            logger.info(f"Reports: {reports}")
-
-            if not reports:
-                logger.error("Reports data is empty")
-                return JsonResponse({"error": "Reports data is empty"}, status=400)
-
-            user_scorm_status = None
-            for report in reports:
-                user_scorm_status, created = UserScormStatus.objects.update_or_create(
-                    client_user=client_user,
-                    _scorm_id=str(report['id']),
-                    scorm_name=report['scormname'],
-                    attempt=int(report['attempt']),
-                    defaults={
-                        'complete_status': report['complete_status'],
-                        'satisfied_status': report['satisfied_status'],
-                        'total_time': report['total_time'],
-                        'score': report['score'],
-                        'created_at': datetime.strptime(report['created_at'], '%Y-%m-%d %H:%M:%S'),
-                        'updated_at': datetime.strptime(report['updated_at'], '%Y-%m-%d %H:%M:%S'),
-                    }
-                )
-                break
-
-            if user_scorm_status:
-                logger.info("User SCORM status updated successfully")
-                response_data = {
-                    'learner_id': user_scorm_status.client_user.cloudscorm_user_id,
-                    'learner_name': user_scorm_status.client_user.first_name,
-                    'learner_email': user_scorm_status.client_user.email,
-                    'scorm_id': user_scorm_status._scorm_id,
-                    'scorm_name': user_scorm_status.scorm_name,
-                    'complete_status': user_scorm_status.complete_status,
-                    'satisfied_status': user_scorm_status.satisfied_status,
-                    'total_time': user_scorm_status.total_time,
-                    'score': user_scorm_status.score,
-                    'attempt': user_scorm_status.attempt,
-                    'created_at': user_scorm_status.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'updated_at': user_scorm_status.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }
-                return JsonResponse(response_data, status=200)
-            else:
-                logger.error("No UserScormStatus object found for the given SCORM ID")
-                return JsonResponse({"error": "No UserScormStatus object found for the given SCORM ID"}, status=404)
-        else:
+        # learner
+        client_user = ClientUser.objects.get(learner_id=learner_id, client_id=client.id)
+        logger.info(f"Client User: {client_user}, Name: {client_user.first_name}")
+
+        # Serve the stored status, refreshing it in the background once it is stale
+        user_scorm_status = latest_stored_status(client_user.id, scorm)
+        if user_scorm_status is not None:
+            if not is_fresh(user_scorm_status):
+                schedule_status_refresh(client_user.id, scorm.id)
+            return JsonResponse(serialize_status(user_scorm_status, client_user), status=200)
+
+        # Nothing stored yet, so wait for CloudScorm
+        try:
+            user_scorm_status = refresh_status(client_user, scorm)
+        except StatusFetchError:
             logger.error("Failed to get user SCORM status from API")
             return JsonResponse({"error": "Failed to get user SCORM status from API"}, status=400)
+
+        if user_scorm_status is None:
+            logger.error("Reports data is empty")
+            return JsonResponse({"error": "Reports data is empty"}, status=400)
+
+        logger.info("User SCORM status updated successfully")
+        return JsonResponse(serialize_status(user_scorm_status, client_user), status=200)
     except Exception as e:
         logger.exception("An error occurred in user_scorm_status")
         return JsonResponse({"error": str(e)}, status=400)
-    
\ No newline at end of file
+
+
+@csrf_exempt
+@require_POST
+def batch_user_scorm_status(request):
+    """
+    Returns the SCORM status of many learners of one client and SCORM package at once.
+
+    Stored statuses are served when fresh. Learners with a stale or missing status are
+    fetched from CloudScorm concurrently, at most STATUS_BATCH_CONCURRENCY at a time.
+
+    Args:
+        request (HTTPRequest): The incoming request, with a JSON body containing:
+            * id (str): The launch ID of the SCORM package, as embedded in its wrapper.
+            * referringurl (str): The referring domain of the LMS.
+            * learner_ids (list): The learner identifiers to report on, as strings.
+
+    Returns:
+        JsonResponse: A JSON response with:
+            * statuses (dict): The status of each learner found, by learner ID.
+            * errors (dict): Why no status was returned, by learner ID.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    launch_id = data.get("id")
+    referringurl = data.get("referringurl")
+    learner_ids = data.get("learner_ids")
+    if not launch_id or not referringurl or not isinstance(learner_ids, list) or not learner_ids:
+        logger.error("Missing required data")
+        return JsonResponse({"error": "Missing required data"}, status=400)
+    if not isinstance(launch_id, str) or not isinstance(referringurl, str):
+        return JsonResponse({"error": "id and referringurl must be strings"}, status=400)
+    if not all(isinstance(learner_id, str) for learner_id in learner_ids):
+        return JsonResponse({"error": "learner_ids must be a list of strings"}, status=400)
+    if len(learner_ids) > settings.STATUS_BATCH_MAX_LEARNERS:
+        return JsonResponse(
+            {"error": f"At most {settings.STATUS_BATCH_MAX_LEARNERS} learners per request"}, status=400
+        )
+    learner_ids = list(dict.fromkeys(learner_ids))
+
+    try:
+        client_id, scorm_id, _ = read_launch_id(launch_id, check_validity=False)
+    except ValueError:
+        logger.error("Invalid client identifier")
+        return JsonResponse({"error": "Invalid client identifier"}, status=400)
+
+    assignment = get_assignment(client_id, scorm_id)
+    if assignment is None:
+        logger.error("Scorm assignment not found")
+        return JsonResponse({"error": "Scorm assignment not found"}, status=404)
+    client = assignment.client
+    scorm = assignment.scorm_asset
+
+    if not get_domain_allowlist(client.id).allows(referringurl):
+        logger.error("Invalid referring URL")
+        return JsonResponse({"error": "Invalid referring URL"}, status=400)
+
+    client_users = {}
+    for client_user in ClientUser.objects.filter(client_id=client.id, learner_id__in=learner_ids).order_by("id"):
+        client_users.setdefault(client_user.learner_id, client_user)
+
+    latest = latest_stored_statuses([client_user.id for client_user in client_users.values()], scorm)
+
+    # Refresh the learners whose stored status is stale or missing
+    now = timezone.now()
+    to_fetch = [
+        client_user
+        for client_user in client_users.values()
+        if client_user.cloudscorm_user_id
+        and (client_user.id not in latest or not is_fresh(latest[client_user.id], now))
+    ]
+    fetched = fetch_statuses(
+        [(client_user.id, client_user.cloudscorm_user_id, scorm.scorm_id) for client_user in to_fetch],
+        settings.STATUS_BATCH_CONCURRENCY,
+    )
+    upsert_statuses(status for learner_statuses in fetched for status in learner_statuses or ())
+    for client_user, learner_statuses in zip(to_fetch, fetched):
+        if learner_statuses:
+            latest[client_user.id] = max(learner_statuses, key=lambda status: status.attempt)
+
+    statuses = {}
+    errors = {}
+    for learner_id in learner_ids:
+        client_user = client_users.get(learner_id)
+        if client_user is None:
+            errors[learner_id] = "Learner not found"
+        elif client_user.id not in latest:
+            errors[learner_id] = "No status available"
+        else:
+            statuses[learner_id] = serialize_status(latest[client_user.id], client_user)
+
+    return JsonResponse({"statuses": statuses, "errors": errors}, status=200)
+
+
+@csrf_exempt
+@require_POST
+def status_webhook(request):
+    """
+    Receives learner status events pushed by CloudScorm and queues them for ingestion.
+
+    The request must be signed as described in verify_webhook_signature. The body is
+    either one event or {"events": [...]}, each event being a CloudScorm attempt report
+    with the learner's CloudScorm "user_id" added. Events already queued are ignored,
+    so deliveries can safely be retried.
+
+    Returns:
+        JsonResponse: 202 with the number of events accepted, or an error.
+    """
+    if not verify_webhook_signature(request.body, request.headers.get("X-Webhook-Signature")):
+        logger.error("Invalid webhook signature")
+        return JsonResponse({"error": "Invalid signature"}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        events = data["events"] if isinstance(data, dict) and "events" in data else [data]
+        if not isinstance(events, list):
+            raise ValueError("events must be a list")
+        if len(events) > settings.STATUS_WEBHOOK_MAX_EVENTS:
+            raise ValueError(f"At most {settings.STATUS_WEBHOOK_MAX_EVENTS} events per request")
+        status_events = [parse_status_event(event) for event in events]
+    except ValueError as e:
+        logger.error(f"Rejected status events: {e}")
+        return JsonResponse({"error": str(e)}, status=400)
+
+    StatusEvent.objects.bulk_create(status_events, ignore_conflicts=True)
+    schedule_status_ingest()
+    return JsonResponse({"accepted": len(status_events)}, status=202)
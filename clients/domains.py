@@ -0,0 +1,96 @@
+from urllib.parse import urlsplit
+
+WILDCARD_PREFIX = "*."
+
+
+def normalize_host(value) -> str:
+    """
+    Reduces a domain or URL to the bare host it refers to.
+
+    The scheme, credentials, port, path, trailing dot and a leading "www." are
+    dropped and the result is lowercased, so "https://WWW.Example.com:443/lms"
+    becomes "example.com".
+
+    Returns:
+        str: The normalized host, or an empty string if there is none.
+    """
+    value = (value or "").strip()
+    if not value:
+        return ""
+    if "//" not in value:
+        value = f"//{value}"
+    try:
+        host = urlsplit(value).hostname or ""
+    except ValueError:
+        return ""
+    host = host.rstrip(".")
+    if host.startswith("www."):
+        host = host[len("www."):]
+    return host
+
+
+def reverse_host(host) -> str:
+    """
+    Reverses the labels of a host, e.g. "lms.example.com" becomes "com.example.lms".
+    """
+    return ".".join(reversed(host.split(".")))
+
+
+def host_suffixes(host) -> list:
+    """
+    Returns the reversed forms of a host and of every domain above it.
+
+    "lms.example.com" gives ["com", "com.example", "com.example.lms"]; these are the
+    wildcard keys of a DomainAllowlist that can match it.
+    """
+    labels = host.split(".")[::-1]
+    return [".".join(labels[:i]) for i in range(1, len(labels) + 1)]
+
+
+def parse_domain_entry(entry):
+    """
+    Parses one allowlist entry into its normalized host and whether it covers subdomains.
+
+    "*.example.com" allows example.com and any of its subdomains.
+
+    Returns:
+        tuple: The normalized host and the include_subdomains flag.
+    """
+    entry = (entry or "").strip()
+    include_subdomains = entry.startswith(WILDCARD_PREFIX)
+    if include_subdomains:
+        entry = entry[len(WILDCARD_PREFIX):]
+    return normalize_host(entry), include_subdomains
+
+
+def parse_domains(domains) -> set:
+    """
+    Parses a comma-separated domains string into a set of (host, include_subdomains) entries.
+    """
+    entries = (parse_domain_entry(entry) for entry in (domains or "").split(","))
+    return {(host, include_subdomains) for host, include_subdomains in entries if host}
+
+
+class DomainAllowlist:
+    """
+    An in-memory index of a client's allowed domains.
+
+    Exact hosts are kept in one set and wildcard domains, stored reversed, in another,
+    so a lookup costs one set probe per label of the referring host.
+    """
+
+    def __init__(self, entries=()):
+        self.exact = set()
+        self.wildcards = set()
+        for host, include_subdomains in entries:
+            self.exact.add(host)
+            if include_subdomains:
+                self.wildcards.add(reverse_host(host))
+
+    def allows(self, referring_url) -> bool:
+        host = normalize_host(referring_url)
+        if not host:
+            return False
+        if host in self.exact:
+            return True
+        return any(suffix in self.wildcards for suffix in host_suffixes(host))
@@ -0,0 +1,67 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ClientUser
+
+# The columns of a progress export, and the ClientUser lookups they are read from
+PROGRESS_COLUMNS = (
+    ("learner_id", "learner_id"),
+    ("first_name", "first_name"),
+    ("last_name", "last_name"),
+    ("email", "email"),
+    ("scorm_id", "userscormstatus___scorm_id"),
+    ("scorm_name", "userscormstatus__scorm_name"),
+    ("attempt", "userscormstatus__attempt"),
+    ("complete_status", "userscormstatus__complete_status"),
+    ("satisfied_status", "userscormstatus__satisfied_status"),
+    ("score", "userscormstatus__score_value"),
+    ("total_seconds", "userscormstatus__total_seconds"),
+    ("updated_at", "userscormstatus__updated_at"),
+)
+
+
+def progress_rows(client_id, chunk_size=2000):
+    """
+    Yields one row per learner and SCORM package with the learner's latest attempt.
+
+    Learners without any status get a single row with empty status columns. Rows are
+    read from a server-side cursor `chunk_size` at a time, so memory use does not grow
+    with the number of learners.
+
+    Yields:
+        tuple: The values of PROGRESS_COLUMNS.
+    """
+    rows = (
+        ClientUser.objects.filter(client_id=client_id)
+        .order_by("id", "userscormstatus___scorm_id", "-userscormstatus__attempt")
+        .values_list("id", *(lookup for _, lookup in PROGRESS_COLUMNS))
+    )
+    last_key = None
+    for client_user_id, *values in rows.iterator(chunk_size=chunk_size):
+        # Rows come latest attempt first, so later rows for the same package are older attempts
+        key = (client_user_id, values[4])
+        if key == last_key:
+            continue
+        last_key = key
+        yield values
+
+
+class _Echo:
+    # csv.writer only needs a write method; returning the line lets it be yielded
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in PROGRESS_COLUMNS])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    names = [name for name, _ in PROGRESS_COLUMNS]
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + "\n"
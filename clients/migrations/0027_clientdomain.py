@@ -0,0 +1,54 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0026_remove_clientuser_launch_url"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClientDomain",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("host", models.CharField(max_length=255)),
+                ("reversed_host", models.CharField(max_length=255)),
+                ("include_subdomains", models.BooleanField(default=False)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="allowed_domains",
+                        to="clients.client",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["client", "reversed_host"],
+                        name="clientdomain_lookup_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="clientdomain",
+            constraint=models.UniqueConstraint(
+                fields=("client", "host", "include_subdomains"),
+                name="unique_client_domain",
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from urllib.parse import urlsplit
+
+from django.db import migrations
+
+
+def normalize_host(value):
+    value = (value or "").strip()
+    if not value:
+        return ""
+    if "//" not in value:
+        value = f"//{value}"
+    try:
+        host = urlsplit(value).hostname or ""
+    except ValueError:
+        return ""
+    host = host.rstrip(".")
+    if host.startswith("www."):
+        host = host[len("www.") :]
+    return host
+
+
+def populate_client_domains(apps, schema_editor):
+    Client = apps.get_model("clients", "Client")
+    ClientDomain = apps.get_model("clients", "ClientDomain")
+    client_domains = []
+    for client in (
+        Client.objects.exclude(domains__isnull=True).exclude(domains="").iterator()
+    ):
+        entries = set()
+        for entry in client.domains.split(","):
+            entry = entry.strip()
+            include_subdomains = entry.startswith("*.")
+            host = normalize_host(entry[2:] if include_subdomains else entry)
+            if host:
+                entries.add((host, include_subdomains))
+        client_domains.extend(
+            ClientDomain(client=client, host=host, include_subdomains=include_subdomains)
+            for host, include_subdomains in entries
+        )
+    ClientDomain.objects.bulk_create(client_domains, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0027_clientdomain"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_client_domains, migrations.RunPython.noop),
+    ]
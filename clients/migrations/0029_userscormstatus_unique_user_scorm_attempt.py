@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:29
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def delete_duplicate_attempts(apps, schema_editor):
+    # Keep the most recently inserted row of every (client_user, _scorm_id, attempt)
+    UserScormStatus = apps.get_model("clients", "UserScormStatus")
+    duplicates = (
+        UserScormStatus.objects.values("client_user", "_scorm_id", "attempt")
+        .annotate(count=Count("id"), keep_id=Max("id"))
+        .filter(count__gt=1, client_user__isnull=False)
+    )
+    for duplicate in list(duplicates):
+        UserScormStatus.objects.filter(
+            client_user=duplicate["client_user"],
+            _scorm_id=duplicate["_scorm_id"],
+            attempt=duplicate["attempt"],
+        ).exclude(id=duplicate["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0028_populate_clientdomain"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_attempts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="userscormstatus",
+            constraint=models.UniqueConstraint(
+                fields=("client_user", "_scorm_id", "attempt"),
+                name="unique_user_scorm_attempt",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0029_userscormstatus_unique_user_scorm_attempt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userscormstatus",
+            name="synced_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
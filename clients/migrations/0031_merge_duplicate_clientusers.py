@@ -0,0 +1,64 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:34
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_clientusers(apps, schema_editor):
+    # Fold every later (learner_id, client) duplicate into the oldest row, moving its
+    # mappings and statuses over unless the oldest row already has the same one
+    ClientUser = apps.get_model("clients", "ClientUser")
+    UserScormStatus = apps.get_model("clients", "UserScormStatus")
+    UserScormMapping = apps.get_model("scorm", "UserScormMapping")
+
+    duplicates = (
+        ClientUser.objects.values("learner_id", "client")
+        .annotate(count=Count("id"), keep_id=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in list(duplicates):
+        keep = ClientUser.objects.get(id=duplicate["keep_id"])
+        others = ClientUser.objects.filter(
+            learner_id=duplicate["learner_id"], client=duplicate["client"]
+        ).exclude(id=keep.id)
+
+        if not keep.cloudscorm_user_id:
+            keep.cloudscorm_user_id = (
+                others.exclude(cloudscorm_user_id__isnull=True)
+                .exclude(cloudscorm_user_id="")
+                .values_list("cloudscorm_user_id", flat=True)
+                .order_by("id")
+                .first()
+            )
+            keep.save(update_fields=["cloudscorm_user_id"])
+
+        assignment_ids = UserScormMapping.objects.filter(user=keep).values("assignment")
+        UserScormMapping.objects.filter(
+            user__in=others, assignment__in=assignment_ids
+        ).delete()
+        UserScormMapping.objects.filter(user__in=others).update(user=keep)
+
+        for status in UserScormStatus.objects.filter(client_user__in=others).order_by(
+            "-updated_at"
+        ):
+            if UserScormStatus.objects.filter(
+                client_user=keep, _scorm_id=status._scorm_id, attempt=status.attempt
+            ).exists():
+                status.delete()
+            else:
+                status.client_user = keep
+                status.save(update_fields=["client_user"])
+
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0030_userscormstatus_synced_at"),
+        ("scorm", "0016_scormassignment_seats_used"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_clientusers, migrations.RunPython.noop),
+    ]
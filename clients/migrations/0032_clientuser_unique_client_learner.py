@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0031_merge_duplicate_clientusers"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="clientuser",
+            index=models.Index(
+                fields=["cloudscorm_user_id"], name="clientuser_cloudscorm_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="clientuser",
+            constraint=models.UniqueConstraint(
+                fields=("learner_id", "client"), name="unique_client_learner"
+            ),
+        ),
+    ]
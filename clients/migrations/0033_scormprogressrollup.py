@@ -0,0 +1,55 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0032_clientuser_unique_client_learner"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScormProgressRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scorm_id", models.CharField(max_length=255)),
+                ("learners", models.IntegerField(default=0)),
+                ("completed", models.IntegerField(default=0)),
+                ("incomplete", models.IntegerField(default=0)),
+                ("passed", models.IntegerField(default=0)),
+                ("failed", models.IntegerField(default=0)),
+                (
+                    "score_sum",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("score_count", models.IntegerField(default=0)),
+                ("total_seconds", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="progress_rollups",
+                        to="clients.client",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="scormprogressrollup",
+            constraint=models.UniqueConstraint(
+                fields=("client", "scorm_id"), name="unique_client_scorm_rollup"
+            ),
+        ),
+    ]
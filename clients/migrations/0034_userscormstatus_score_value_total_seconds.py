@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0033_scormprogressrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userscormstatus",
+            name="score_value",
+            field=models.DecimalField(
+                blank=True, decimal_places=4, max_digits=12, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="userscormstatus",
+            name="total_seconds",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="userscormstatus",
+            index=models.Index(
+                fields=["_scorm_id", "score_value"], name="userscormstatus_score_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userscormstatus",
+            index=models.Index(
+                fields=["_scorm_id", "total_seconds"], name="userscormstatus_time_idx"
+            ),
+        ),
+    ]
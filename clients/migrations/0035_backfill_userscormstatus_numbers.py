@@ -0,0 +1,99 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+SCORE_PLACES = Decimal("0.0001")
+SCORE_LIMIT = Decimal(10) ** 8
+TOTAL_SECONDS_LIMIT = 2**31 - 1
+ISO_DURATION = re.compile(
+    r"P(?:(?P<years>\d+(?:\.\d+)?)Y)?(?:(?P<months>\d+(?:\.\d+)?)M)?(?:(?P<weeks>\d+(?:\.\d+)?)W)?"
+    r"(?:(?P<days>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?"
+)
+ISO_UNIT_SECONDS = {
+    "years": 365 * 86400,
+    "months": 30 * 86400,
+    "weeks": 7 * 86400,
+    "days": 86400,
+    "hours": 3600,
+    "minutes": 60,
+    "seconds": 1,
+}
+
+
+def parse_score(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        score = Decimal(value)
+    except InvalidOperation:
+        return None
+    if not score.is_finite() or abs(score) >= SCORE_LIMIT:
+        return None
+    return score.quantize(SCORE_PLACES)
+
+
+def parse_total_time(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+
+    if value.startswith("P"):
+        match = ISO_DURATION.fullmatch(value)
+        if not match or value == "P" or value.endswith("T"):
+            return None
+        total = sum(
+            float(amount) * ISO_UNIT_SECONDS[unit]
+            for unit, amount in match.groupdict().items()
+            if amount
+        )
+        return int(total) if total <= TOTAL_SECONDS_LIMIT else None
+
+    parts = value.split(":")
+    if len(parts) != 3:
+        return None
+    try:
+        hours, minutes, seconds = int(parts[0]), int(parts[1]), float(parts[2])
+    except ValueError:
+        return None
+    if hours < 0 or not 0 <= minutes < 60 or not 0 <= seconds < 60:
+        return None
+    total = hours * 3600 + minutes * 60 + int(seconds)
+    return total if total <= TOTAL_SECONDS_LIMIT else None
+
+
+def backfill_numbers(apps, schema_editor):
+    # Walk the table in ID order so every batch is its own short transaction
+    UserScormStatus = apps.get_model("clients", "UserScormStatus")
+    last_id = 0
+    while True:
+        batch = list(
+            UserScormStatus.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "score", "total_time")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for status in batch:
+            status.score_value = parse_score(status.score)
+            status.total_seconds = parse_total_time(status.total_time)
+        UserScormStatus.objects.bulk_update(batch, ["score_value", "total_seconds"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("clients", "0034_userscormstatus_score_value_total_seconds"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_numbers, migrations.RunPython.noop),
+    ]
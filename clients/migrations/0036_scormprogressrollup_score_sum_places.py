@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0035_backfill_userscormstatus_numbers"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="scormprogressrollup",
+            name="score_sum",
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0036_scormprogressrollup_score_sum_places"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="clientdomain",
+            name="clientdomain_lookup_idx",
+        ),
+        migrations.RemoveField(
+            model_name="clientdomain",
+            name="reversed_host",
+        ),
+    ]
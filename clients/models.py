@@ -1,8 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.apps import apps
 from cryptography.fernet import Fernet
 
+from .domains import parse_domains
+
 class Client(models.Model):
     """
     Represents a client in the system.
@@ -35,9 +37,55 @@ class Client(models.Model):
     def scorm_assignment_count(self):
         ScormAssignment = apps.get_model('scorm', 'ScormAssignment')
         return ScormAssignment.objects.filter(client=self).count()
+
+    def sync_domains(self):
+        """
+        Brings the client's ClientDomain rows in line with the comma-separated domains field.
+
+        Only the entries that were added or removed are written, so saving a client
+        whose domains did not change touches no rows.
+        """
+        entries = parse_domains(self.domains)
+        with transaction.atomic():
+            stored = {
+                (domain.host, domain.include_subdomains): domain.pk
+                for domain in self.allowed_domains.only("host", "include_subdomains")
+            }
+            removed = [pk for entry, pk in stored.items() if entry not in entries]
+            if removed:
+                self.allowed_domains.filter(pk__in=removed).delete()
+            ClientDomain.objects.bulk_create(
+                ClientDomain(client=self, host=host, include_subdomains=include_subdomains)
+                for host, include_subdomains in entries - stored.keys()
+            )
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+
+class ClientDomain(models.Model):
+    """
+    Represents a domain a client's learners may launch from.
+
+    Attributes:
+        client (Client): The client the domain belongs to.
+        host (str): The normalized host, without scheme, port or leading "www.".
+        include_subdomains (bool): Whether every subdomain of the host is allowed too.
+    """
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="allowed_domains")
+    host = models.CharField(max_length=255)
+    include_subdomains = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["client", "host", "include_subdomains"], name="unique_client_domain"
+            ),
+        ]
+
+    def __str__(self):
+        return f"*.{self.host}" if self.include_subdomains else self.host
     
 
 class ClientUser(models.Model):
@@ -65,7 +113,16 @@ class ClientUser(models.Model):
     cloudscorm_user_id = models.CharField(max_length=255, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
+    class Meta:
+        constraints = [
+            # learner_id leads so the index also serves lookups by learner ID alone
+            models.UniqueConstraint(fields=["learner_id", "client"], name="unique_client_learner"),
+        ]
+        indexes = [
+            models.Index(fields=["cloudscorm_user_id"], name="clientuser_cloudscorm_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name}"
     
@@ -77,9 +134,78 @@ class UserScormStatus(models.Model):
     satisfied_status = models.CharField(max_length=255, blank=True, null=True)
     total_time = models.CharField(max_length=255, blank=True, null=True)
     score = models.CharField(max_length=255, blank=True, null=True)
+    # score and total_time parsed, so they can be filtered, sorted and summed in SQL
+    score_value = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
+    total_seconds = models.IntegerField(null=True, blank=True)
     attempt = models.IntegerField(default=1)
     created_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["client_user", "_scorm_id", "attempt"], name="unique_user_scorm_attempt"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["_scorm_id", "score_value"], name="userscormstatus_score_idx"),
+            models.Index(fields=["_scorm_id", "total_seconds"], name="userscormstatus_time_idx"),
+        ]
 
     def __str__(self):
-        return f"UserScormStatus for {self.client_user} and {self.scorm_name}"
\ No newline at end of file
+        return f"UserScormStatus for {self.client_user} and {self.scorm_name}"
+
+class ScormProgressRollup(models.Model):
+    """
+    The progress of a client's learners on one SCORM package, summed over each learner's
+    latest attempt.
+
+    Rows are kept up to date by api.status.upsert_statuses as statuses are stored and can
+    be recomputed with the rebuild_progress_rollups command.
+
+    Attributes:
+        client (Client): The client the learners belong to.
+        scorm_id (str): The CloudScorm SCORM ID, as stored in UserScormStatus._scorm_id.
+        learners (int): The number of learners with at least one attempt.
+        completed (int): The learners whose latest attempt is completed.
+        incomplete (int): The learners whose latest attempt is incomplete.
+        passed (int): The learners whose latest attempt is passed.
+        failed (int): The learners whose latest attempt is failed.
+        score_sum (Decimal): The sum of the scores of the latest attempts that have one.
+        score_count (int): The number of latest attempts that have a score.
+        total_seconds (int): The time spent on the latest attempts, in seconds.
+        updated_at (datetime): When the rollup last changed.
+    """
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="progress_rollups")
+    scorm_id = models.CharField(max_length=255)
+    learners = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    incomplete = models.IntegerField(default=0)
+    passed = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    score_count = models.IntegerField(default=0)
+    total_seconds = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["client", "scorm_id"], name="unique_client_scorm_rollup"),
+        ]
+
+    def __str__(self):
+        return f"Progress of {self.client} on SCORM {self.scorm_id}"
+
+    @property
+    def completion_rate(self):
+        return self.completed / self.learners if self.learners else None
+
+    @property
+    def average_score(self):
+        return self.score_sum / self.score_count if self.score_count else None
+
+    @property
+    def average_seconds(self):
+        return self.total_seconds // self.learners if self.learners else None
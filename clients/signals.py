@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Client, ClientUser
+from .tasks import schedule_cloudscorm_provisioning
+
+
+@receiver(post_save, sender=ClientUser)
+def preprovision_cloudscorm_user(sender, instance, created, **kwargs):
+    """
+    Provisions new learners on CloudScorm in the background when CLOUDSCORM_PREPROVISION is on.
+    """
+    if created and settings.CLOUDSCORM_PREPROVISION and not instance.cloudscorm_user_id:
+        transaction.on_commit(lambda: schedule_cloudscorm_provisioning(instance.pk))
+
+
+@receiver(post_save, sender=Client)
+def sync_client_domains(sender, instance, **kwargs):
+    """
+    Keeps the ClientDomain rows in step with the client's comma-separated domains.
+    """
+    instance.sync_domains()
@@ -1,4 +1,14 @@
-# from celery import shared_task
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from api.utils import create_user_on_cloudscorm
+from .models import ClientUser
+
+logger = logging.getLogger(__name__)
 
 # @shared_task
 # def user_logged_in_task(user_id):
@@ -6,4 +16,57 @@
 
 # @shared_task
 # def user_logged_out_task(user_id):
-#     print(f"User {user_id} logged out")
\ No newline at end of file
+#     print(f"User {user_id} logged out")
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def provision_cloudscorm_user(self, client_user_id):
+    """
+    Creates the learner on CloudScorm and stores their CloudScorm user ID.
+
+    Safe to run more than once for the same learner: an ID that is already stored is
+    returned as is and never overwritten.
+
+    Args:
+        client_user_id (int): The ID of the ClientUser to provision.
+
+    Returns:
+        str: The learner's CloudScorm user ID, or None if the learner no longer exists.
+    """
+    learners = ClientUser.objects.filter(pk=client_user_id)
+    client_user = learners.values("learner_id", "cloudscorm_user_id").first()
+    if client_user is None:
+        return None
+    if client_user["cloudscorm_user_id"]:
+        return client_user["cloudscorm_user_id"]
+
+    cloudscorm_user_data = create_user_on_cloudscorm(client_user["learner_id"], settings.API_TOKEN1)
+    logger.info(f"CloudScorm User Data: {cloudscorm_user_data}")
+    if cloudscorm_user_data:
+        learners.filter(cloudscorm_user_id__isnull=True).update(
+            cloudscorm_user_id=str(cloudscorm_user_data["user_id"]), updated_at=timezone.now()
+        )
+
+    # Another run may have provisioned the learner while this one was signing up
+    cloudscorm_user_id = learners.values_list("cloudscorm_user_id", flat=True).first()
+    if cloudscorm_user_id:
+        cache.delete(provision_lock_key(client_user_id))
+        return cloudscorm_user_id
+    if self.request.retries >= self.max_retries:
+        cache.delete(provision_lock_key(client_user_id))
+    raise self.retry()
+
+
+def provision_lock_key(client_user_id) -> str:
+    return f"cloudscorm-provision:{client_user_id}"
+
+
+def schedule_cloudscorm_provisioning(client_user_id):
+    """
+    Queues the CloudScorm signup of a learner unless one is already queued or running.
+
+    The lock is held until the task succeeds or gives up, so the pre-provisioning
+    signal and any number of launches retried by the LMS share one signup.
+    """
+    if cache.add(provision_lock_key(client_user_id), 1, settings.CLOUDSCORM_PROVISION_LOCK_TIMEOUT):
+        provision_cloudscorm_user.delay(client_user_id)
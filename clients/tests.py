@@ -1,3 +1,74 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from .domains import DomainAllowlist, normalize_host, parse_domains
+from .models import Client, ClientDomain
+
+
+class NormalizeHostTests(SimpleTestCase):
+    def test_normalize_host(self):
+        for value, host in (
+            ("example.com", "example.com"),
+            ("https://WWW.Example.com:443/lms", "example.com"),
+            ("http://lms.example.com:8080", "lms.example.com"),
+            ("//user:pass@lms.example.com/path?q=1", "lms.example.com"),
+            ("lms.example.com.", "lms.example.com"),
+            ("  www.example.com  ", "example.com"),
+            ("wwwexample.com", "wwwexample.com"),
+            ("", ""),
+            (None, ""),
+            ("http://[::1", ""),
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(normalize_host(value), host)
+
+
+class DomainAllowlistTests(SimpleTestCase):
+    def setUp(self):
+        self.allowlist = DomainAllowlist(parse_domains("*.example.com, https://www.lms.org:8443/"))
+
+    def test_exact_host(self):
+        self.assertTrue(self.allowlist.allows("lms.org"))
+        self.assertTrue(self.allowlist.allows("https://WWW.LMS.org/course"))
+        self.assertFalse(self.allowlist.allows("sub.lms.org"))
+
+    def test_wildcard_matches_the_apex_and_subdomains(self):
+        for referring_url in ("example.com", "https://example.com", "lms.example.com", "a.b.example.com:8000"):
+            with self.subTest(referring_url=referring_url):
+                self.assertTrue(self.allowlist.allows(referring_url))
+
+    def test_lookalike_hosts_are_refused(self):
+        for referring_url in (
+            "evilexample.com",
+            "example.com.evil.net",
+            "https://example.com@evil.net/",
+            "example.co",
+            "com",
+            "",
+            None,
+        ):
+            with self.subTest(referring_url=referring_url):
+                self.assertFalse(self.allowlist.allows(referring_url))
+
+
+class SyncDomainsTests(TestCase):
+    def test_sync_domains(self):
+        client = Client.objects.create(
+            first_name="Acme", email="acme@example.com", company="Acme", domains="*.example.com, lms.org"
+        )
+        self.assertEqual(
+            set(client.allowed_domains.values_list("host", "include_subdomains")),
+            {("example.com", True), ("lms.org", False)},
+        )
+        kept = client.allowed_domains.get(host="example.com").pk
+
+        client.domains = "*.example.com,other.net"
+        client.save()
+        self.assertEqual(
+            set(client.allowed_domains.values_list("host", "include_subdomains")),
+            {("example.com", True), ("other.net", False)},
+        )
+        self.assertEqual(client.allowed_domains.get(host="example.com").pk, kept)
+
+        client.domains = ""
+        client.save()
+        self.assertFalse(ClientDomain.objects.filter(client=client).exists())
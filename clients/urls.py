@@ -7,5 +7,6 @@ urlpatterns = [
     path('logout/', views.client_logout_view, name='client-logout'),
     path('client-details/<int:client_id>/', views.client_details_view_for_clientadmin, name='client-details-clientadmin'),
     path('client-details/<int:client_id>/users/', views.users_list_for_clientadmin, name='users-list-for-clientadmin'),
+    path('client-details/<int:client_id>/export/', views.export_progress_for_clientadmin, name='export-progress-clientadmin'),
     path('create-client-user/', views.ClientUserCreateView.as_view(), name='create-client-user'),
 ]
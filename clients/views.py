@@ -1,6 +1,7 @@
 from django.contrib import messages
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
@@ -17,6 +18,7 @@ from scorm.models import ScormAssignment, ScormAsset
 from accounts.decorators import allowed_users
 
 # from .tasks import user_logged_in_task, user_logged_out_task
+from .exports import progress_rows, stream_csv, stream_ndjson
 from .forms import ClientCreationForm, ClientUpdateForm, ClientLoginForm, ClientUserForm
 from .models import Client, ClientUser
 
@@ -24,6 +26,11 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
 @login_required
 @allowed_users(allowed_roles=["coreadmin"])
 def create_client_view(request):
@@ -209,7 +216,10 @@ def client_details_view_for_clientadmin(request, client_id):
     if request.user.client.id != client.id:
         raise PermissionDenied
     
-    assignments = ScormAssignment.objects.filter(client=client)
+    assignments = ScormAssignment.objects.filter(client=client).select_related("scorm_asset")
+    rollups = {rollup.scorm_id: rollup for rollup in client.progress_rollups.all()}
+    for assignment in assignments:
+        assignment.progress = rollups.get(str(assignment.scorm_asset.scorm_id))
     return render(
         request,
         "clients/client_details_for_clientadmin.html",
@@ -323,6 +333,45 @@ def users_list_for_clientadmin(request, client_id):
     return render(request, "clients/users_clientadmin.html", {"users": users, "client": client})
 
 
+@login_required
+@allowed_users(allowed_roles=["clientadmin"])
+def export_progress_for_clientadmin(request, client_id):
+    """
+    Streams the latest status of every learner of the client as CSV or NDJSON.
+
+    The format is chosen with the `format` query parameter ("csv" by default or
+    "ndjson"). Rows are written as they are read from the database, so the download
+    starts at once and memory use stays flat however many learners there are.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        client_id (int): The ID of the client to export.
+
+    Returns:
+        StreamingHttpResponse: The export as an attachment.
+
+    Raises:
+        Http404: If the client with the specified ID does not exist.
+        PermissionDenied: If the logged-in user is not allowed to view the client's details.
+    """
+    client = get_object_or_404(Client, id=client_id)
+
+    if request.user.client.id != client.id:
+        raise PermissionDenied
+
+    export_format = request.GET.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(
+            f"Unknown export format; use one of: {', '.join(EXPORT_FORMATS)}", content_type="text/plain"
+        )
+
+    stream, content_type = EXPORT_FORMATS[export_format]
+    rows = progress_rows(client.id, chunk_size=settings.EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(stream(rows), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="learner-progress-{client.id}.{export_format}"'
+    return response
+
+
 class ClientUserCreateView(View):
     def get(self, request, *args, **kwargs):
         # Get the client from the logged in user
@@ -37,6 +37,16 @@ urlpatterns = [
         scorm_views.download_scorm,
         name="download-scorm",
     ),
+    path(
+        "client-details/<int:client_id>/download-scorm/<int:scorm_id>/patches/",
+        scorm_views.scorm_patch_chain,
+        name="scorm-patch-chain",
+    ),
+    path(
+        "client-details/<int:client_id>/download-scorm/<int:scorm_id>/patches/<int:patch_id>/",
+        scorm_views.download_scorm_patch,
+        name="download-scorm-patch",
+    ),
     
     path('client-details/<int:client_id>/users/', client_views.users_list_for_coreadmin, name='users-list-for-coreadmin'),
 ]
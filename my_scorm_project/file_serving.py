@@ -0,0 +1,197 @@
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.utils.module_loading import import_string
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def content_disposition(filename) -> str:
+    return f'attachment; filename="{filename}"'
+
+
+def parse_range(header, size):
+    """
+    Parses a Range header asking for a single byte range.
+
+    Headers that are malformed or ask for several ranges are ignored, as RFC 9110 allows,
+    and the whole file is sent.
+
+    Returns:
+        tuple: The first and last byte of the range, or None to send the whole file.
+
+    Raises:
+        RangeNotSatisfiable: If the range starts past the end of the file.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first:
+        first = int(first)
+        if last and int(last) < first:
+            return None
+        if first >= size:
+            raise RangeNotSatisfiable
+        return first, min(int(last), size - 1) if last else size - 1
+    if not last:
+        return None
+    suffix = int(last)
+    if not suffix or not size:
+        raise RangeNotSatisfiable
+    return max(size - suffix, 0), size - 1
+
+
+def if_range_passes(request, etag, last_modified) -> bool:
+    """
+    Returns whether a Range request may be answered with a part of the current file.
+
+    An If-Range naming another version means the client's part is stale and the
+    whole file has to be sent.
+    """
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _read_range(name, first, last):
+    # Opened on the first chunk, so a response closed before it is sent holds no file
+    with default_storage.open(name, "rb") as file:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class FileResponseBackend:
+    """
+    Streams protected files through the Django worker.
+
+    Meant for development, where there is no front proxy to hand the transfer to.
+    """
+
+    handles_ranges = False
+
+    def serve(self, name, content_type, filename, byte_range=None) -> HttpResponse:
+        if byte_range is None:
+            response = FileResponse(default_storage.open(name, "rb"), content_type=content_type)
+        else:
+            first, last = byte_range
+            response = StreamingHttpResponse(_read_range(name, first, last), status=206, content_type=content_type)
+            response["Content-Length"] = str(last - first + 1)
+        response["Content-Disposition"] = content_disposition(filename)
+        return response
+
+
+class XAccelRedirectBackend:
+    """
+    Hands protected files to nginx with an X-Accel-Redirect header.
+
+    nginx needs an internal location mapping PROTECTED_FILE_ACCEL_PREFIX onto MEDIA_ROOT,
+    and answers Range requests itself:
+
+        location /protected/ {
+            internal;
+            alias /path/to/media/;
+        }
+    """
+
+    handles_ranges = True
+
+    def serve(self, name, content_type, filename, byte_range=None) -> HttpResponse:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(f"{settings.PROTECTED_FILE_ACCEL_PREFIX}{name}")
+        response["Content-Disposition"] = content_disposition(filename)
+        return response
+
+
+class XSendfileBackend:
+    """
+    Hands protected files to Apache mod_xsendfile, or any proxy that honours X-Sendfile,
+    by their path on disk. The storage has to be a local filesystem. The proxy answers
+    Range requests itself.
+    """
+
+    handles_ranges = True
+
+    def serve(self, name, content_type, filename, byte_range=None) -> HttpResponse:
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = default_storage.path(name)
+        response["Content-Disposition"] = content_disposition(filename)
+        return response
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.PROTECTED_FILE_BACKEND)()
+
+
+def serve_protected_file(request, name, content_type, filename, content_key) -> HttpResponse:
+    """
+    Returns a response that sends a stored file as an attachment.
+
+    The caller is responsible for checking the user may have the file. How its bytes
+    reach the client is up to the PROTECTED_FILE_BACKEND, so a front proxy can send
+    large files without holding a Django worker for the whole transfer.
+
+    Every response carries a strong ETag, made from the file's content key, and its
+    Last-Modified time. If-None-Match and If-Modified-Since are answered with 304.
+    A single-range Range request gets a 206 with that part of the file, or a 416 if
+    the range is past its end; backends that hand the file to a proxy leave ranges
+    to the proxy.
+
+    Args:
+        request (HttpRequest): The download request.
+        name (str): The name of the file in the default storage.
+        content_type (str): The Content-Type to send it with.
+        filename (str): The filename the client saves it as.
+        content_key (str): A hash that changes whenever the file's content does, such as
+            the content address in its name. The file itself is never hashed here.
+    """
+    size = default_storage.size(name)
+    last_modified = int(default_storage.get_modified_time(name).timestamp())
+    etag = quote_etag(content_key)
+
+    validators = HttpResponse()
+    validators["ETag"] = etag
+    validators["Last-Modified"] = http_date(last_modified)
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified, response=validators)
+    if conditional is not validators:
+        return conditional
+
+    backend = get_backend()
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and not backend.handles_ranges and if_range_passes(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    response = backend.serve(name, content_type, filename, byte_range)
+    response["ETag"] = etag
+    response["Last-Modified"] = validators["Last-Modified"]
+    response["Accept-Ranges"] = "bytes"
+    if byte_range is not None:
+        response["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+    return response
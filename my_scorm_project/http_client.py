@@ -0,0 +1,143 @@
+import logging
+import random
+import threading
+import time
+from http import cookiejar
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class _RejectAllCookies(cookiejar.DefaultCookiePolicy):
+    # The session is shared by every request, so no cookie may leak from one call into the next
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+def log_timing(method, url, status_code, elapsed, attempt):
+    logger.debug(
+        "%s %s -> %s in %.1f ms (attempt %d)", method, url, status_code, elapsed * 1000, attempt
+    )
+
+
+class HttpClient:
+    """
+    A shared HTTP client for outbound calls to CloudScorm and client LMSs.
+
+    Connections are kept alive in per-host pools, so repeated calls to the same host
+    skip the TCP and TLS handshakes. Every call gets a connect and read timeout unless
+    one is given. Idempotent calls are retried on connection errors and on 429/502/503/504
+    with exponential backoff and full jitter. Timing hooks are called after every attempt
+    with (method, url, status_code, elapsed_seconds, attempt); status_code is None when
+    the attempt failed before a response arrived.
+
+    Attributes:
+        connect_timeout (float): The default connect timeout in seconds.
+        read_timeout (float): The default read timeout in seconds.
+        max_retries (int): The number of retries for idempotent calls.
+        backoff_factor (float): The base delay in seconds of the retry backoff.
+    """
+
+    def __init__(
+        self,
+        pool_connections=10,
+        pool_maxsize=10,
+        connect_timeout=3.05,
+        read_timeout=30,
+        max_retries=2,
+        backoff_factor=0.5,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timing_hooks = [log_timing]
+        self._session = requests.Session()
+        self._session.cookies.set_policy(_RejectAllCookies())
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._hooks_lock = threading.Lock()
+
+    def add_timing_hook(self, hook):
+        with self._hooks_lock:
+            self.timing_hooks = [*self.timing_hooks, hook]
+
+    def remove_timing_hook(self, hook):
+        with self._hooks_lock:
+            self.timing_hooks = [h for h in self.timing_hooks if h is not hook]
+
+    def request(self, method, url, idempotent=None, timeout=None, **kwargs) -> requests.Response:
+        """
+        Sends a request through the shared session.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL to call.
+            idempotent (bool): Whether the call may be retried. Defaults to True for
+                GET, HEAD, OPTIONS, PUT and DELETE. Pass True for POSTs that only read.
+            timeout (float or tuple): Overrides the default (connect, read) timeout.
+            **kwargs: Passed on to requests.Session.request.
+
+        Returns:
+            requests.Response: The response of the last attempt.
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt failed.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        retries = self.max_retries if idempotent else 0
+
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            try:
+                response = self._session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._run_timing_hooks(method, url, None, time.monotonic() - started, attempt)
+                if attempt > retries:
+                    raise
+            else:
+                self._run_timing_hooks(method, url, response.status_code, time.monotonic() - started, attempt)
+                if attempt > retries or response.status_code not in RETRY_STATUSES:
+                    return response
+                response.close()
+
+            time.sleep(random.uniform(0, self.backoff_factor * 2 ** (attempt - 1)))
+
+    def get(self, url, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def _run_timing_hooks(self, method, url, status_code, elapsed, attempt):
+        for hook in self.timing_hooks:
+            try:
+                hook(method, url, status_code, elapsed, attempt)
+            except Exception:
+                logger.exception("HTTP timing hook failed")
+
+
+http_client = HttpClient(
+    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+    read_timeout=settings.HTTP_READ_TIMEOUT,
+    max_retries=settings.HTTP_MAX_RETRIES,
+    backoff_factor=settings.HTTP_BACKOFF_FACTOR,
+)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
@@ -141,6 +142,26 @@ STATICFILES_DIRS = (
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# SCORM wrappers are built from this template the first time they are downloaded,
+# or right after assignment when SCORM_WRAPPER_PREBUILD is set
+SCORM_WRAPPER_TEMPLATE = os.path.join(MEDIA_ROOT, 'scorm_wrapper', 'scorm-wrapper-template.zip')
+SCORM_WRAPPER_DIR = 'scorm_wrappers'
+SCORM_WRAPPER_PREBUILD = os.getenv('SCORM_WRAPPER_PREBUILD', 'False') == 'True'
+SCORM_WRAPPER_BUILD_WAIT = 30
+SCORM_WRAPPER_BUILD_LOCK_TIMEOUT = 120
+SCORM_WRAPPER_ROLLOUT_BATCH_SIZE = 200
+SCORM_WRAPPER_ROLLOUT_WORKERS = 8
+SCORM_WRAPPER_ROLLOUT_LOCK_TIMEOUT = 6 * 3600
+# How downloads are sent once Django has checked access: streamed by Django
+# (my_scorm_project.file_serving.FileResponseBackend), or handed to the front proxy with
+# XAccelRedirectBackend (nginx) or XSendfileBackend (Apache mod_xsendfile)
+PROTECTED_FILE_BACKEND = os.getenv('PROTECTED_FILE_BACKEND', 'my_scorm_project.file_serving.FileResponseBackend')
+# The internal nginx location that serves MEDIA_ROOT for XAccelRedirectBackend
+PROTECTED_FILE_ACCEL_PREFIX = os.getenv('PROTECTED_FILE_ACCEL_PREFIX', '/protected/')
+
+# The number of bsdiff4 patches kept per assignment; older clients download the whole package
+SCORM_WRAPPER_PATCH_CHAIN_LENGTH = 5
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -169,9 +190,108 @@ LOGGING = {
 
 MAX_UPLOAD_SIZE = 2147483648
 
+# Whether this process is running the test suite
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+# The cache has to be shared by every web and Celery worker: it holds the authorization
+# cache version and the locks that keep syncs, ingests, wrapper builds and rollouts
+# from running twice. It defaults to the Redis that Celery uses. Tests, and local
+# development with CACHE_REDIS_URL set empty, use a per-process cache instead; the
+# api.E001 check refuses that anywhere else.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://redis:6379/1')
+
+if CACHE_REDIS_URL and not TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Keys that sign the launch tokens embedded in SCORM wrappers, by key version.
+# Rotate by adding a version and pointing LAUNCH_TOKEN_KEY_VERSION at it.
+LAUNCH_TOKEN_KEYS = {
+    '1': os.getenv('LAUNCH_TOKEN_KEY', SECRET_KEY),
+}
+LAUNCH_TOKEN_KEY_VERSION = '1'
+# Whether the unsigned "client-scorm" launch IDs of wrappers built before launch tokens
+# are still accepted. They can be forged: set this to False once the wrapper rollout
+# of a template using {{ LAUNCH_TOKEN }} has finished and the LMSs have re-imported
+# their packages.
+ACCEPT_LEGACY_LAUNCH_IDS = os.getenv('ACCEPT_LEGACY_LAUNCH_IDS', 'True') == 'True'
+
+# Client/assignment lookups made by the launch and status APIs
+AUTHZ_CACHE_MAXSIZE = 1024
+AUTHZ_CACHE_TIMEOUT = 300
+AUTHZ_CACHE_VERSION_TTL = 1.0
+AUTHZ_CACHE_LOCAL_TTL = 30
+
+# Outbound calls to CloudScorm and client LMSs
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 20
+HTTP_CONNECT_TIMEOUT = 3.05
+HTTP_READ_TIMEOUT = 30
+HTTP_MAX_RETRIES = 2
+HTTP_BACKOFF_FACTOR = 0.5
+
 CELERY_BROKER_URL = 'redis://redis:6379/0'
 CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 
+# Provision learners on CloudScorm as soon as their ClientUser is created
+CLOUDSCORM_PREPROVISION = os.getenv('CLOUDSCORM_PREPROVISION', 'False') == 'True'
+# Seconds a first launch waits for provisioning before asking the LMS to retry
+CLOUDSCORM_PROVISION_WAIT = 2
+# Covers a signup and its retries; no second signup is queued for the learner meanwhile
+CLOUDSCORM_PROVISION_LOCK_TIMEOUT = 120
+
+# Stored statuses younger than this many seconds are served as is; older ones are
+# served while a background refresh runs
+STATUS_FRESH_TTL = 300
+STATUS_REFRESH_LOCK_TIMEOUT = 60
+
+# Batch status endpoint
+STATUS_BATCH_MAX_LEARNERS = 5000
+STATUS_BATCH_CONCURRENCY = 16
+
+# Bulk pull of learner statuses from CloudScorm
+STATUS_SYNC_CHUNK_SIZE = 200
+STATUS_SYNC_CONCURRENCY = 8
+STATUS_SYNC_MAX_PER_RUN = 5000
+STATUS_SYNC_LOCK_TIMEOUT = 60 * 60
+
+# Rows read per database round trip by the streaming progress export
+EXPORT_CHUNK_SIZE = 2000
+
+# Status events pushed by CloudScorm
+STATUS_WEBHOOK_SECRET = os.getenv('STATUS_WEBHOOK_SECRET')
+STATUS_WEBHOOK_MAX_EVENTS = 1000
+STATUS_INGEST_DELAY = 5
+STATUS_INGEST_BATCH_SIZE = 1000
+STATUS_INGEST_MAX_FAILURES = 5
+
+CELERY_BEAT_SCHEDULE = {
+    'sync-learner-statuses': {
+        'task': 'api.tasks.sync_learner_statuses',
+        'schedule': 15 * 60,
+    },
+    # Picks up any events whose drain was never queued
+    'ingest-status-events': {
+        'task': 'api.tasks.ingest_status_events',
+        'schedule': 5 * 60,
+    },
+    # Rebuilds stored wrappers after the wrapper template changes; a no-op otherwise
+    'rollout-wrapper-template': {
+        'task': 'scorm.tasks.rollout_wrapper_template',
+        'schedule': 60 * 60,
+    },
+}
+
 SESSION_COOKIE_AGE = 12000 
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
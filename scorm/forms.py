@@ -3,9 +3,10 @@ from django.core.files import File
 import logging
 from django import forms
 from django.conf import settings
+from django.db import transaction
 from .models import ScormAsset, ScormAssignment, ScormResponse
 from clients.models import Client
-from .utils import encrypt_data, decrypt_data, create_modified_scorm_wrapper
+from .tasks import build_assignment_wrappers
 
 logger = logging.getLogger(__name__)
 
@@ -29,36 +30,50 @@ class AssignSCORMForm(forms.ModelForm):
         model = ScormAssignment
         fields = ["number_of_seats", "validity_start_date", "validity_end_date"]
 
+    def clean(self):
+        cleaned_data = super().clean()
+        client = cleaned_data.get("client")
+        scorms = cleaned_data.get("scorms")
+        if client and scorms:
+            assigned = ScormAsset.objects.filter(
+                pk__in=[scorm.pk for scorm in scorms], scormassignment__client=client
+            ).values_list("title", flat=True)
+            if assigned:
+                raise forms.ValidationError(
+                    f"Already assigned to this client: {', '.join(assigned)}"
+                )
+        return cleaned_data
+
     def save(self, client, commit=True):
+        """
+        Creates an assignment for every selected SCORM package.
+
+        The wrappers are not built here. They are built on their first download or,
+        with SCORM_WRAPPER_PREBUILD, queued in parallel once the assignments are committed.
+        """
         selected_scorms = self.cleaned_data["scorms"]
         number_of_seats = self.cleaned_data["number_of_seats"]
         validity_start_date = self.cleaned_data["validity_start_date"]
         validity_end_date = self.cleaned_data["validity_end_date"]
-        assignments = []
-
-        for scorm in selected_scorms:
-            assignment = ScormAssignment(
+        assignments = [
+            ScormAssignment(
                 scorm_asset=scorm,
                 client=client,
                 number_of_seats=number_of_seats,
                 validity_start_date=validity_start_date,
                 validity_end_date=validity_end_date,
+                wrapper_status=ScormAssignment.WRAPPER_PENDING,
             )
+            for scorm in selected_scorms
+        ]
 
-            encrypted_id = encrypt_data(client.id, assignment.scorm_asset.id)
-            logger.info(f"Encrypted ID: {encrypted_id}")
-            client_specific_data = {"id": encrypted_id, "scorm_title": scorm.title, "referring_url": client.domains}
-
-            # Modify the SCORM wrapper and save it in the ScormAssignment model
-            assignment = create_modified_scorm_wrapper(
-                client_specific_data,
-                assignment,
-            )
-
-            if commit:
-                assignment.save()
-                scorm.save()  # Save the ScormAsset model after updating the scorm_file field
-
-            assignments.append(assignment)
+        if commit:
+            with transaction.atomic():
+                for assignment in assignments:
+                    assignment.save()
+                if settings.SCORM_WRAPPER_PREBUILD:
+                    assignment_ids = [assignment.pk for assignment in assignments]
+                    transaction.on_commit(lambda: build_assignment_wrappers(assignment_ids))
+            logger.info(f"Created {len(assignments)} assignment(s) for client {client.id}")
 
         return assignments
\ No newline at end of file
@@ -0,0 +1,75 @@
+import os
+import timeit
+import zipfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scorm.placeholders import PLACEHOLDER_PATTERN, TEXT_EXTENSIONS, CompiledText, placeholder_values
+from scorm.wrappers import WrapperTemplate, compile_member, file_digest
+
+SAMPLE_DATA = {
+    "id": "1.MTItMzQtNTYtMC0w.dGhpc0lEaXNfc2lnbmVk",
+    "token": "1.MTItMzQtNTYtMC0w.dGhpc0lEaXNfc2lnbmVk",
+    "scorm_title": "Fire Safety ID Training",
+    "referring_url": "lms.example.com",
+}
+
+
+def legacy_replace(contents, placeholders, is_configuration):
+    # The chained str.replace substitution wrappers were built with before compiled templates
+    new_contents = contents
+    for placeholder, value in placeholders.items():
+        if placeholder == "ID" and is_configuration:
+            parts = new_contents.split(placeholder)
+            if len(parts) >= 4:
+                parts[1] = value + parts[1]
+                parts[3] = value + parts[3]
+                new_contents = placeholder.join(parts)
+        else:
+            new_contents = new_contents.replace(placeholder, value)
+    return new_contents
+
+
+class Command(BaseCommand):
+    help = 'Compares rendering wrapper template files with compiled placeholders against the legacy str.replace chain.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', help='The wrapper template zip; defaults to SCORM_WRAPPER_TEMPLATE')
+        parser.add_argument('--number', type=int, default=10000, help='Renders per measurement')
+
+    def handle(self, *args, **kwargs):
+        path = kwargs['template'] or settings.SCORM_WRAPPER_TEMPLATE
+        number = kwargs['number']
+        values = placeholder_values(SAMPLE_DATA)
+
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                filename = os.path.basename(info.filename)
+                if info.is_dir() or not filename.lower().endswith(TEXT_EXTENSIONS):
+                    continue
+                data = archive.read(info)
+                compiled = compile_member(filename, data)
+                if not compiled:
+                    continue
+
+                source = data.decode()
+                if CompiledText.compile(source):
+                    placeholders = {match.group(0): values[match.group(1)] for match in PLACEHOLDER_PATTERN.finditer(source)}
+                    is_configuration = False
+                else:
+                    placeholders = {'ID': values['ID']}
+                    is_configuration = True
+
+                legacy = timeit.timeit(lambda: legacy_replace(source, placeholders, is_configuration), number=number)
+                rendered = timeit.timeit(lambda: compiled.render(values), number=number)
+                self.stdout.write(
+                    f'{filename} ({len(source)} chars, {len(compiled.names)} placeholder(s)): '
+                    f'legacy {legacy / number * 1e6:.2f} µs, compiled {rendered / number * 1e6:.2f} µs '
+                    f'({legacy / rendered:.1f}x)'
+                )
+
+        template = WrapperTemplate(path, file_digest(path))
+        renders = max(number // 100, 1)
+        whole = timeit.timeit(lambda: template.render(SAMPLE_DATA), number=renders)
+        self.stdout.write(self.style.SUCCESS(f'Whole wrapper: {whole / renders * 1e3:.3f} ms per render'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from scorm.models import ScormAssignment, UserScormMapping
+
+
+class Command(BaseCommand):
+    help = 'Recomputes ScormAssignment.seats_used from the UserScormMapping table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assignment_ids', nargs='*', type=int, help='Only reconcile these assignments')
+
+    def handle(self, *args, **kwargs):
+        mapping_count = (
+            UserScormMapping.objects.filter(assignment=OuterRef('pk'))
+            .order_by()
+            .values('assignment')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        assignments = ScormAssignment.objects.annotate(
+            actual_seats=Coalesce(Subquery(mapping_count), Value(0))
+        )
+        if kwargs['assignment_ids']:
+            assignments = assignments.filter(pk__in=kwargs['assignment_ids'])
+
+        fixed = 0
+        for assignment in assignments.only('pk', 'seats_used').iterator():
+            if assignment.seats_used == assignment.actual_seats:
+                continue
+            # Recount inside the UPDATE so mappings created since the scan are included
+            ScormAssignment.objects.filter(pk=assignment.pk).update(
+                seats_used=Coalesce(Subquery(mapping_count), Value(0))
+            )
+            self.stdout.write(
+                f'Assignment {assignment.pk}: seats_used {assignment.seats_used} -> {assignment.actual_seats}'
+            )
+            fixed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {fixed} assignment(s)'))
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from scorm.rollout import run_rollout
+from scorm.tasks import ROLLOUT_LOCK_KEY, rollout_wrapper_template
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the stored SCORM wrappers that were built from an older wrapper template.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Assignments checked per batch')
+        parser.add_argument('--workers', type=int, help='Wrappers built concurrently')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and check every assignment again')
+        parser.add_argument('--queue', action='store_true', help='Run the rollout as a Celery task instead of here')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['queue']:
+            rollout_wrapper_template.delay(restart=kwargs['restart'])
+            self.stdout.write(self.style.SUCCESS('Queued the wrapper rollout'))
+            return
+
+        def progress(rollout):
+            self.stdout.write(
+                f'Checked {rollout.checked} (up to assignment {rollout.last_assignment_id}), '
+                f'rebuilt {rollout.rebuilt}, failed {rollout.failed}'
+            )
+
+        # Shares the lock of the scheduled rollout, so the two never checkpoint the same row
+        if not cache.add(ROLLOUT_LOCK_KEY, 1, settings.SCORM_WRAPPER_ROLLOUT_LOCK_TIMEOUT):
+            raise CommandError('A wrapper rollout is already running; try again once it has finished')
+        try:
+            rollout = run_rollout(
+                batch_size=kwargs['batch_size'],
+                workers=kwargs['workers'],
+                restart=kwargs['restart'],
+                progress=progress,
+            )
+        finally:
+            cache.delete(ROLLOUT_LOCK_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            f'{rollout}: {rollout.checked} checked, {rollout.rebuilt} rebuilt, {rollout.failed} failed'
+        ))
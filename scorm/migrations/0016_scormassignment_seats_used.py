@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_seats_used(apps, schema_editor):
+    ScormAssignment = apps.get_model("scorm", "ScormAssignment")
+    UserScormMapping = apps.get_model("scorm", "UserScormMapping")
+    mapping_count = (
+        UserScormMapping.objects.filter(assignment=OuterRef("pk"))
+        .order_by()
+        .values("assignment")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    ScormAssignment.objects.update(
+        seats_used=Coalesce(Subquery(mapping_count), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scorm", "0015_userscormmapping_launch_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scormassignment",
+            name="seats_used",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_seats_used, migrations.RunPython.noop),
+    ]
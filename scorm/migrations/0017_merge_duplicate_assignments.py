@@ -0,0 +1,75 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:34
+
+from django.db import migrations
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_assignments(apps, schema_editor):
+    # Fold every later (client, scorm_asset) assignment into the oldest one, which is
+    # the one launches already resolve to, keeping the larger seat count
+    ScormAssignment = apps.get_model("scorm", "ScormAssignment")
+    UserScormMapping = apps.get_model("scorm", "UserScormMapping")
+
+    duplicates = (
+        ScormAssignment.objects.values("client", "scorm_asset")
+        .annotate(count=Count("id"), keep_id=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in list(duplicates):
+        keep = ScormAssignment.objects.get(id=duplicate["keep_id"])
+        others = ScormAssignment.objects.filter(
+            client=duplicate["client"], scorm_asset=duplicate["scorm_asset"]
+        ).exclude(id=keep.id)
+
+        keep.number_of_seats = max(
+            keep.number_of_seats, *others.values_list("number_of_seats", flat=True)
+        )
+        keep.save(update_fields=["number_of_seats"])
+
+        user_ids = UserScormMapping.objects.filter(assignment=keep).values("user")
+        UserScormMapping.objects.filter(
+            assignment__in=others, user__in=user_ids
+        ).delete()
+        UserScormMapping.objects.filter(assignment__in=others).update(assignment=keep)
+        others.delete()
+
+
+def delete_duplicate_mappings(apps, schema_editor):
+    # Keep the oldest mapping of every (user, assignment), then recount the seats
+    ScormAssignment = apps.get_model("scorm", "ScormAssignment")
+    UserScormMapping = apps.get_model("scorm", "UserScormMapping")
+
+    duplicates = (
+        UserScormMapping.objects.values("user", "assignment")
+        .annotate(count=Count("id"), keep_id=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in list(duplicates):
+        UserScormMapping.objects.filter(
+            user=duplicate["user"], assignment=duplicate["assignment"]
+        ).exclude(id=duplicate["keep_id"]).delete()
+
+    mapping_count = (
+        UserScormMapping.objects.filter(assignment=OuterRef("pk"))
+        .order_by()
+        .values("assignment")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    ScormAssignment.objects.update(
+        seats_used=Coalesce(Subquery(mapping_count), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scorm", "0016_scormassignment_seats_used"),
+        ("clients", "0031_merge_duplicate_clientusers"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_assignments, migrations.RunPython.noop),
+        migrations.RunPython(delete_duplicate_mappings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scorm", "0017_merge_duplicate_assignments"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="scormassignment",
+            constraint=models.UniqueConstraint(
+                fields=("client", "scorm_asset"), name="unique_client_scorm_assignment"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="userscormmapping",
+            constraint=models.UniqueConstraint(
+                fields=("user", "assignment"), name="unique_user_scorm_mapping"
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:42
+
+from django.db import migrations, models
+
+
+def mark_built_wrappers_ready(apps, schema_editor):
+    # Wrappers used to be built inside the assignment request, so any stored file is complete
+    ScormAssignment = apps.get_model("scorm", "ScormAssignment")
+    ScormAssignment.objects.exclude(client_scorm_file="").exclude(
+        client_scorm_file__isnull=True
+    ).update(wrapper_status="ready")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scorm", "0018_scormassignment_unique_client_scorm_assignment_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scormassignment",
+            name="wrapper_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(mark_built_wrappers_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scorm", "0019_scormassignment_wrapper_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scormassignment",
+            name="wrapper_key",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scorm", "0020_scormassignment_wrapper_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WrapperRollout",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("template_digest", models.CharField(max_length=64, unique=True)),
+                ("last_assignment_id", models.BigIntegerField(default=0)),
+                ("checked", models.IntegerField(default=0)),
+                ("rebuilt", models.IntegerField(default=0)),
+                ("failed", models.IntegerField(default=0)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
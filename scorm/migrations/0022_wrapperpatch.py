@@ -0,0 +1,49 @@
+# Generated by Django 4.2.11 on 2026-10-17 02:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scorm", "0021_wrapperrollout"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WrapperPatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("from_key", models.CharField(max_length=64)),
+                ("to_key", models.CharField(max_length=64)),
+                ("patch_file", models.FileField(max_length=255, upload_to="")),
+                ("patch_size", models.IntegerField()),
+                ("target_size", models.IntegerField()),
+                ("target_digest", models.CharField(max_length=64)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "assignment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="wrapper_patches",
+                        to="scorm.scormassignment",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="wrapperpatch",
+            constraint=models.UniqueConstraint(
+                fields=("assignment", "from_key", "to_key"), name="unique_wrapper_patch"
+            ),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
 from clients.models import Client, ClientUser
 
 
@@ -83,7 +85,19 @@ class ScormAssignment(models.Model):
         validity_start_date (DateTimeField): The start date and time of the assignment's validity period.
         validity_end_date (DateTimeField): The end date and time of the assignment's validity period.
         client_scorm_file (FileField): The uploaded Scorm file associated with the assignment.
+        seats_used (IntegerField): The number of learners holding a seat, kept in step with UserScormMapping.
+        wrapper_status (CharField): Whether client_scorm_file has been built yet, is ready or failed to build.
+        wrapper_key (CharField): The content address of the wrapper in client_scorm_file.
     """
+    WRAPPER_PENDING = "pending"
+    WRAPPER_READY = "ready"
+    WRAPPER_FAILED = "failed"
+    WRAPPER_STATUS_CHOICES = [
+        (WRAPPER_PENDING, "Pending"),
+        (WRAPPER_READY, "Ready"),
+        (WRAPPER_FAILED, "Failed"),
+    ]
+
     client = models.ForeignKey(Client, on_delete=models.CASCADE)
     scorm_asset = models.ForeignKey(ScormAsset, on_delete=models.CASCADE)
     date_assigned = models.DateTimeField(auto_now_add=True)
@@ -91,9 +105,49 @@ class ScormAssignment(models.Model):
     validity_start_date = models.DateTimeField(blank=True, null=True)
     validity_end_date = models.DateTimeField(blank=True, null=True)
     client_scorm_file = models.FileField(upload_to='client_scorm_files/', null=True, blank=True)
-    
+    seats_used = models.IntegerField(default=0)
+    wrapper_status = models.CharField(max_length=10, choices=WRAPPER_STATUS_CHOICES, default=WRAPPER_PENDING)
+    wrapper_key = models.CharField(max_length=64, blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["client", "scorm_asset"], name="unique_client_scorm_assignment"),
+        ]
+
     def __str__(self):
         return f"{self.client} - {self.scorm_asset}"
+
+    @property
+    def wrapper_status_label(self) -> str:
+        # Without prebuilding, a pending wrapper is simply one nobody has downloaded yet
+        if self.wrapper_status == self.WRAPPER_PENDING and not settings.SCORM_WRAPPER_PREBUILD:
+            return "Built on first download"
+        return self.get_wrapper_status_display()
+
+    def claim_seat(self, client_user):
+        """
+        Gives the learner a seat on this assignment, creating their UserScormMapping.
+
+        The seat is taken with a conditional UPDATE so concurrent launches can never
+        push seats_used past number_of_seats. The learner's row is locked while the
+        mapping is looked up so the same learner is never counted twice.
+
+        Returns:
+            UserScormMapping: The learner's mapping, or None if no seats are left.
+        """
+        with transaction.atomic():
+            ClientUser.objects.select_for_update().only("pk").get(pk=client_user.pk)
+            mapping = UserScormMapping.objects.filter(user=client_user, assignment=self).first()
+            if mapping:
+                return mapping
+
+            claimed = ScormAssignment.objects.filter(
+                pk=self.pk, seats_used__lt=F("number_of_seats")
+            ).update(seats_used=F("seats_used") + 1)
+            if not claimed:
+                return None
+
+            return UserScormMapping.objects.create(user=client_user, assignment=self)
     
 class UserScormMapping(models.Model):
     """
@@ -103,7 +157,78 @@ class UserScormMapping(models.Model):
     user = models.ForeignKey(ClientUser, on_delete=models.CASCADE)
     assignment = models.ForeignKey(ScormAssignment, on_delete=models.CASCADE)
     launch_url = models.URLField(blank=True, null=True)
-    
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "assignment"], name="unique_user_scorm_mapping"),
+        ]
+
+
+class WrapperRollout(models.Model):
+    """
+    The progress of rebuilding the stored wrappers after the wrapper template changed.
+
+    Attributes:
+        template_digest (str): The SHA-256 of the template the wrappers are rebuilt from.
+        last_assignment_id (int): The ID of the last assignment checked; the rollout resumes after it.
+        checked (int): The number of assignments checked so far.
+        rebuilt (int): The number of wrappers rebuilt so far.
+        failed (int): The number of wrappers that could not be rebuilt.
+        started_at (datetime): When the rollout started.
+        finished_at (datetime): When every assignment had been checked, or None while running.
+        updated_at (datetime): When the last checkpoint was written.
+    """
+
+    template_digest = models.CharField(max_length=64, unique=True)
+    last_assignment_id = models.BigIntegerField(default=0)
+    checked = models.IntegerField(default=0)
+    rebuilt = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Wrapper rollout of template {self.template_digest[:12]}"
+
+
+class WrapperPatch(models.Model):
+    """
+    A binary delta between two versions of an assignment's wrapper.
+
+    A patch is stored whenever an assignment's wrapper is replaced, so a client holding
+    an older package can download the patches leading to the current one instead of
+    the whole package. Following to_key from one patch to the next gives the chain.
+
+    Attributes:
+        assignment (ForeignKey): The assignment whose wrapper changed.
+        from_key (str): The content address of the wrapper the patch applies to.
+        to_key (str): The content address of the wrapper the patch produces.
+        patch_file (FileField): The bsdiff4 patch.
+        patch_size (int): The size of the patch in bytes.
+        target_size (int): The size of the produced wrapper in bytes.
+        target_digest (str): The SHA-256 of the produced wrapper, to check the patch was applied correctly.
+        created_at (datetime): When the patch was stored.
+    """
+
+    assignment = models.ForeignKey(ScormAssignment, on_delete=models.CASCADE, related_name="wrapper_patches")
+    from_key = models.CharField(max_length=64)
+    to_key = models.CharField(max_length=64)
+    patch_file = models.FileField(max_length=255)
+    patch_size = models.IntegerField()
+    target_size = models.IntegerField()
+    target_digest = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["assignment", "from_key", "to_key"], name="unique_wrapper_patch"),
+        ]
+
+    def __str__(self):
+        return f"{self.assignment}: {self.from_key[:12]} -> {self.to_key[:12]}"
+
+
 class Course(models.Model):
     title = models.CharField(max_length=200)
     code = models.CharField(max_length=50, unique=True)
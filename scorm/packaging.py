@@ -0,0 +1,117 @@
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .models import ScormAssignment
+from .patches import schedule_wrapper_patch
+from .placeholders import placeholder_values
+from .tokens import sign_launch_token
+from .wrappers import template_cache
+
+logger = logging.getLogger(__name__)
+
+
+class WrapperBuildTimeout(Exception):
+    pass
+
+
+def wrapper_data(assignment) -> dict:
+    """
+    Returns the client-specific values written into an assignment's wrapper.
+    """
+    launch_token = sign_launch_token(assignment)
+    return {
+        "id": launch_token,
+        "token": launch_token,
+        "scorm_title": assignment.scorm_asset.title,
+        "referring_url": assignment.client.domains,
+    }
+
+
+def wrapper_key(template_digest, client_specific_data) -> str:
+    """
+    Returns the content address of a wrapper: a hash of the template version and the
+    placeholder values, so identical wrappers share one stored file.
+    """
+    values = json.dumps(placeholder_values(client_specific_data), sort_keys=True)
+    return hashlib.sha256(f"{template_digest}\n{values}".encode()).hexdigest()
+
+
+def wrapper_name(key) -> str:
+    return f"{settings.SCORM_WRAPPER_DIR}/{key[:2]}/{key}.zip"
+
+
+def build_lock_key(key) -> str:
+    return f"wrapper-build:{key}"
+
+
+def ensure_wrapper(template, key, client_specific_data) -> str:
+    """
+    Returns the storage name of a wrapper, building and storing it if it does not exist yet.
+
+    Builds are single-flight across processes: the first caller takes a cache lock
+    and builds, while concurrent callers for the same key wait for the lock to be
+    released and then use the stored file. A file is only trusted once no build
+    holds its lock, so a half-written file is never served.
+
+    Raises:
+        WrapperBuildTimeout: If another build does not finish within SCORM_WRAPPER_BUILD_WAIT seconds.
+    """
+    name = wrapper_name(key)
+    lock_key = build_lock_key(key)
+    deadline = time.monotonic() + settings.SCORM_WRAPPER_BUILD_WAIT
+
+    while True:
+        if cache.add(lock_key, 1, settings.SCORM_WRAPPER_BUILD_LOCK_TIMEOUT):
+            try:
+                if not default_storage.exists(name):
+                    started = time.monotonic()
+                    saved_name = default_storage.save(name, ContentFile(template.render(client_specific_data)))
+                    if saved_name != name:
+                        raise RuntimeError(f"Wrapper {name} was stored as {saved_name}")
+                    logger.info(f"Built wrapper {name} in {(time.monotonic() - started) * 1000:.1f} ms")
+                return name
+            finally:
+                cache.delete(lock_key)
+
+        if time.monotonic() >= deadline:
+            raise WrapperBuildTimeout(f"Timed out waiting for wrapper {name}")
+        time.sleep(0.1)
+        if cache.get(lock_key) is None and default_storage.exists(name):
+            return name
+
+
+def ensure_assignment_wrapper(assignment) -> str:
+    """
+    Returns the storage name of an assignment's wrapper, building it on first use.
+
+    The assignment remembers the content address of its wrapper, so while neither the
+    template nor the assignment's values change, this costs a stat of the template
+    and a hash, with no storage access. When a wrapper replaces an older one, a patch
+    between the two is queued.
+
+    Raises:
+        WrapperBuildTimeout: If a concurrent build of the same wrapper does not finish in time.
+    """
+    template = template_cache.get(settings.SCORM_WRAPPER_TEMPLATE)
+    data = wrapper_data(assignment)
+    key = wrapper_key(template.digest, data)
+    if assignment.wrapper_key == key and assignment.client_scorm_file:
+        return assignment.client_scorm_file.name
+
+    name = ensure_wrapper(template, key, data)
+    previous_key, previous_name = assignment.wrapper_key, assignment.client_scorm_file.name
+    ScormAssignment.objects.filter(pk=assignment.pk).update(
+        client_scorm_file=name, wrapper_key=key, wrapper_status=ScormAssignment.WRAPPER_READY
+    )
+    assignment.client_scorm_file.name = name
+    assignment.wrapper_key = key
+    assignment.wrapper_status = ScormAssignment.WRAPPER_READY
+    schedule_wrapper_patch(assignment.pk, previous_key, previous_name, key, name)
+    return name
@@ -0,0 +1,137 @@
+import hashlib
+import logging
+
+import bsdiff4
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+
+from .models import WrapperPatch
+
+logger = logging.getLogger(__name__)
+
+
+def patch_name(from_key, to_key) -> str:
+    return f"{settings.SCORM_WRAPPER_DIR}/patches/{to_key[:2]}/{from_key}-{to_key}.bsdiff"
+
+
+def patch_lock_key(assignment_id, from_key, to_key) -> str:
+    return f"wrapper-patch:{assignment_id}:{from_key}:{to_key}"
+
+
+def schedule_wrapper_patch(assignment_id, from_key, from_name, to_key, to_name):
+    """
+    Queues the patch from an assignment's previous wrapper to its new one.
+
+    Nothing is queued when there was no previous wrapper or it did not change.
+    """
+    if not from_key or not from_name or from_key == to_key:
+        return
+    from .tasks import build_wrapper_patch
+
+    build_wrapper_patch.delay(assignment_id, from_key, from_name, to_key, to_name)
+
+
+def build_patch(assignment_id, from_key, from_name, to_key, to_name):
+    """
+    Diffs two stored wrappers of an assignment and stores the patch.
+
+    Patches that are not smaller than the new wrapper are not worth downloading and
+    are not stored. Once stored, only the SCORM_WRAPPER_PATCH_CHAIN_LENGTH most recent
+    patches of the assignment are kept.
+
+    Returns:
+        WrapperPatch: The stored patch, or None if none was stored.
+    """
+    existing = WrapperPatch.objects.filter(assignment_id=assignment_id, from_key=from_key, to_key=to_key).first()
+    if existing:
+        return existing
+    if not default_storage.exists(from_name):
+        logger.info(f"Wrapper {from_name} is gone; no patch for assignment {assignment_id}")
+        return None
+
+    lock_key = patch_lock_key(assignment_id, from_key, to_key)
+    if not cache.add(lock_key, 1, settings.SCORM_WRAPPER_BUILD_LOCK_TIMEOUT):
+        return None
+    try:
+        with default_storage.open(from_name, "rb") as file:
+            source = file.read()
+        with default_storage.open(to_name, "rb") as file:
+            target = file.read()
+
+        patch = bsdiff4.diff(source, target)
+        if len(patch) >= len(target):
+            logger.info(f"Patch {from_key[:12]} -> {to_key[:12]} is no smaller than the wrapper; not stored")
+            return None
+
+        name = patch_name(from_key, to_key)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(patch))
+        try:
+            wrapper_patch = WrapperPatch.objects.create(
+                assignment_id=assignment_id,
+                from_key=from_key,
+                to_key=to_key,
+                patch_file=name,
+                patch_size=len(patch),
+                target_size=len(target),
+                target_digest=hashlib.sha256(target).hexdigest(),
+            )
+        except IntegrityError:
+            return WrapperPatch.objects.filter(assignment_id=assignment_id, from_key=from_key, to_key=to_key).first()
+    finally:
+        cache.delete(lock_key)
+
+    prune_patches(assignment_id)
+    logger.info(f"Stored a {len(patch)} byte patch for the {len(target)} byte wrapper of assignment {assignment_id}")
+    return wrapper_patch
+
+
+def prune_patches(assignment_id):
+    """
+    Deletes an assignment's patches beyond the SCORM_WRAPPER_PATCH_CHAIN_LENGTH most recent.
+
+    Clients holding a wrapper older than the chain download the whole package.
+    """
+    stale = list(
+        WrapperPatch.objects.filter(assignment_id=assignment_id).order_by("-created_at", "-pk")[
+            settings.SCORM_WRAPPER_PATCH_CHAIN_LENGTH :
+        ]
+    )
+    for wrapper_patch in stale:
+        default_storage.delete(wrapper_patch.patch_file.name)
+    WrapperPatch.objects.filter(pk__in=[wrapper_patch.pk for wrapper_patch in stale]).delete()
+
+
+def patch_chain(assignment, from_key):
+    """
+    Returns the patches that turn the wrapper `from_key` into the assignment's current one.
+
+    Returns:
+        list: The patches in the order they apply, empty if `from_key` is current, or
+        None if there is no chain or the chain is no smaller than the current wrapper.
+    """
+    if not from_key or not assignment.wrapper_key:
+        return None
+    if from_key == assignment.wrapper_key:
+        return []
+
+    # Later patches win when a wrapper version was left more than once
+    patches = {
+        wrapper_patch.from_key: wrapper_patch
+        for wrapper_patch in assignment.wrapper_patches.order_by("created_at", "pk")
+    }
+    chain = []
+    key = from_key
+    while key != assignment.wrapper_key:
+        wrapper_patch = patches.pop(key, None)
+        if wrapper_patch is None:
+            return None
+        chain.append(wrapper_patch)
+        key = wrapper_patch.to_key
+
+    if sum(wrapper_patch.patch_size for wrapper_patch in chain) >= chain[-1].target_size:
+        return None
+    return chain
@@ -0,0 +1,153 @@
+import re
+from html import escape as escape_markup
+
+# The placeholders a wrapper template may contain, and the client data key each one is filled from
+PLACEHOLDERS = {
+    "ID": "id",
+    "LAUNCH_TOKEN": "token",
+    "REFERRING_URL": "referring_url",
+    "SCORM_TITLE": "scorm_title",
+}
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(%s)\s*\}\}" % "|".join(PLACEHOLDERS))
+
+# The members searched for placeholders; anything else is copied through untouched
+TEXT_EXTENSIONS = (".js", ".html", ".htm", ".xml", ".json", ".css", ".txt")
+MARKUP_EXTENSIONS = (".html", ".htm", ".xml")
+SCRIPT_EXTENSIONS = (".js", ".json")
+
+# Escapes a value for a JavaScript or JSON string literal, whichever quote it uses.
+# Characters that are safe there are left alone, so launch tokens are written as they are.
+SCRIPT_ESCAPES = {
+    ord("\\"): "\\\\",
+    ord('"'): "\\u0022",
+    ord("'"): "\\u0027",
+    ord("<"): "\\u003C",
+    ord(">"): "\\u003E",
+    ord("&"): "\\u0026",
+    ord("\u2028"): "\\u2028",
+    ord("\u2029"): "\\u2029",
+    **{code: f"\\u{code:04X}" for code in range(32)},
+}
+
+
+def escape_script(value) -> str:
+    return value.translate(SCRIPT_ESCAPES)
+
+
+def escape_for(filename):
+    """
+    Returns the function that escapes placeholder values for a member, by its extension.
+
+    Markup gets XML/HTML escaping and scripts get string literal escaping. Other text
+    members take the values as they are.
+    """
+    filename = filename.lower()
+    if filename.endswith(MARKUP_EXTENSIONS):
+        return escape_markup
+    if filename.endswith(SCRIPT_EXTENSIONS):
+        return escape_script
+    return str
+
+
+class CompiledText:
+    """
+    A text file compiled into literal segments and the placeholders between them.
+
+    The placeholders are located once, when the template is compiled. Rendering only
+    joins the literals with the values, so values are never searched and may contain
+    anything, including placeholder names.
+
+    Attributes:
+        literals (tuple): The text around the placeholders; one more than there are placeholders.
+        names (tuple): The placeholder names, in order.
+        escape (callable): Escapes a value for the text it is written into.
+    """
+
+    def __init__(self, literals, names, escape=str):
+        self.literals = tuple(literals)
+        self.names = tuple(names)
+        self.escape = escape
+
+    @classmethod
+    def compile(cls, text, escape=str):
+        """
+        Compiles a text containing {{ NAME }} placeholders.
+
+        Returns:
+            CompiledText: The compiled text, or None if it has no placeholders.
+        """
+        literals = []
+        names = []
+        start = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            literals.append(text[start : match.start()])
+            names.append(match.group(1))
+            start = match.end()
+        if not names:
+            return None
+        literals.append(text[start:])
+        return cls(literals, names, escape)
+
+    @classmethod
+    def compile_legacy_configuration(cls, text, escape=str):
+        """
+        Compiles a configuration.js from a template that predates named placeholders.
+
+        Those templates take the launch ID right after the first and third
+        occurrences of "ID".
+
+        Returns:
+            CompiledText: The compiled text, or None if "ID" occurs fewer than three times.
+        """
+        positions = []
+        start = 0
+        while len(positions) < 3:
+            index = text.find("ID", start)
+            if index == -1:
+                return None
+            start = index + len("ID")
+            positions.append(start)
+        return cls(
+            [text[: positions[0]], text[positions[0] : positions[2]], text[positions[2] :]],
+            ["ID", "ID"],
+            escape,
+        )
+
+    @property
+    def placeholders(self) -> set:
+        return set(self.names)
+
+    def render(self, values) -> str:
+        """
+        Fills the placeholders, escaping every value.
+
+        Args:
+            values (dict): The value of every placeholder, by name.
+
+        Raises:
+            ValueError: If a placeholder has no value.
+        """
+        try:
+            parts = [self.literals[0]]
+            for name, literal in zip(self.names, self.literals[1:]):
+                parts.append(self.escape(values[name]))
+                parts.append(literal)
+        except KeyError as e:
+            raise ValueError(f"No value for placeholder {e.args[0]}")
+        return "".join(parts)
+
+
+def placeholder_values(client_specific_data) -> dict:
+    """
+    Maps the client data a wrapper is built from to placeholder values.
+
+    The launch token defaults to the launch ID, which is the signed token itself.
+    """
+    values = {
+        name: str(client_specific_data[key])
+        for name, key in PLACEHOLDERS.items()
+        if client_specific_data.get(key) is not None
+    }
+    if "LAUNCH_TOKEN" not in values and "ID" in values:
+        values["LAUNCH_TOKEN"] = values["ID"]
+    return values
@@ -0,0 +1,108 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ScormAssignment, WrapperRollout
+from .packaging import ensure_wrapper, wrapper_data, wrapper_key
+from .patches import schedule_wrapper_patch
+from .wrappers import template_cache
+
+logger = logging.getLogger(__name__)
+
+
+def built_assignments():
+    """
+    Returns the assignments that have a stored wrapper, in ID order.
+
+    Assignments that were never downloaded have nothing to roll out; they are built
+    from the current template on their first download.
+    """
+    return (
+        ScormAssignment.objects.exclude(client_scorm_file="")
+        .exclude(client_scorm_file__isnull=True)
+        .select_related("client", "scorm_asset")
+        .order_by("id")
+    )
+
+
+def _rebuild(template, stale):
+    assignment, key, data = stale
+    try:
+        return assignment, key, ensure_wrapper(template, key, data)
+    except Exception:
+        logger.exception(f"Could not rebuild the wrapper of assignment {assignment.pk}")
+        return assignment, key, None
+
+
+def run_rollout(batch_size=None, workers=None, restart=False, progress=None) -> WrapperRollout:
+    """
+    Rebuilds every stored wrapper that was not built from the current template.
+
+    Assignments are checked in batches of `batch_size`. The stale wrappers of a batch
+    are rebuilt on `workers` threads, the assignments are repointed to them with one
+    bulk update, a patch from each old wrapper is queued, and a checkpoint is saved,
+    so an interrupted rollout resumes after the last finished batch. A rollout that
+    already finished for the current template does nothing.
+
+    Args:
+        batch_size (int): Assignments per batch. Defaults to SCORM_WRAPPER_ROLLOUT_BATCH_SIZE.
+        workers (int): Concurrent builds. Defaults to SCORM_WRAPPER_ROLLOUT_WORKERS.
+        restart (bool): Whether to discard the checkpoint and check every assignment again.
+        progress (callable): Called with the WrapperRollout after every batch.
+
+    Returns:
+        WrapperRollout: The rollout of the current template.
+    """
+    batch_size = batch_size or settings.SCORM_WRAPPER_ROLLOUT_BATCH_SIZE
+    workers = workers or settings.SCORM_WRAPPER_ROLLOUT_WORKERS
+    template = template_cache.get(settings.SCORM_WRAPPER_TEMPLATE)
+
+    rollout, _ = WrapperRollout.objects.get_or_create(template_digest=template.digest)
+    if restart:
+        rollout.last_assignment_id = rollout.checked = rollout.rebuilt = rollout.failed = 0
+        rollout.finished_at = None
+        rollout.save()
+    if rollout.finished_at:
+        return rollout
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(built_assignments().filter(id__gt=rollout.last_assignment_id)[:batch_size])
+            if not batch:
+                rollout.finished_at = timezone.now()
+                rollout.save()
+                logger.info(f"{rollout} finished: {rollout.rebuilt} rebuilt, {rollout.failed} failed")
+                break
+
+            stale = []
+            for assignment in batch:
+                data = wrapper_data(assignment)
+                key = wrapper_key(template.digest, data)
+                if key != assignment.wrapper_key:
+                    stale.append((assignment, key, data))
+
+            rebuilt = []
+            replaced = []
+            for assignment, key, name in executor.map(lambda item: _rebuild(template, item), stale):
+                if name is None:
+                    rollout.failed += 1
+                    continue
+                replaced.append((assignment.pk, assignment.wrapper_key, assignment.client_scorm_file.name, key, name))
+                assignment.client_scorm_file.name = name
+                assignment.wrapper_key = key
+                assignment.wrapper_status = ScormAssignment.WRAPPER_READY
+                rebuilt.append(assignment)
+            ScormAssignment.objects.bulk_update(rebuilt, ["client_scorm_file", "wrapper_key", "wrapper_status"])
+            for change in replaced:
+                schedule_wrapper_patch(*change)
+
+            rollout.last_assignment_id = batch[-1].pk
+            rollout.checked += len(batch)
+            rollout.rebuilt += len(rebuilt)
+            rollout.save()
+            if progress:
+                progress(rollout)
+
+    return rollout
@@ -0,0 +1,15 @@
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ScormAssignment, UserScormMapping
+
+
+@receiver(post_delete, sender=UserScormMapping)
+def release_seat(sender, instance, **kwargs):
+    """
+    Gives a seat back to the assignment when a learner's mapping is removed.
+    """
+    ScormAssignment.objects.filter(pk=instance.assignment_id, seats_used__gt=0).update(
+        seats_used=F("seats_used") - 1
+    )
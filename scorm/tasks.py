@@ -0,0 +1,79 @@
+import logging
+
+from celery import group, shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ScormAssignment
+from .packaging import ensure_assignment_wrapper
+from .patches import build_patch
+from .rollout import run_rollout
+
+logger = logging.getLogger(__name__)
+
+ROLLOUT_LOCK_KEY = "wrapper-rollout"
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def build_assignment_wrapper(self, assignment_id):
+    """
+    Builds and stores an assignment's SCORM wrapper ahead of its first download.
+
+    The wrapper is marked failed once the retries are used up; the next download
+    tries again.
+    """
+    assignment = ScormAssignment.objects.select_related("client", "scorm_asset").get(pk=assignment_id)
+    try:
+        ensure_assignment_wrapper(assignment)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.exception(f"Could not build the wrapper of assignment {assignment_id}")
+            ScormAssignment.objects.filter(pk=assignment_id).update(wrapper_status=ScormAssignment.WRAPPER_FAILED)
+            raise
+        raise self.retry(exc=exc)
+
+
+def build_assignment_wrappers(assignment_ids):
+    """
+    Queues the wrapper builds of several assignments as one Celery group, so they run
+    in parallel across the workers.
+    """
+    group(build_assignment_wrapper.s(assignment_id) for assignment_id in assignment_ids).apply_async()
+
+
+@shared_task
+def build_wrapper_patch(assignment_id, from_key, from_name, to_key, to_name):
+    """
+    Stores the patch between two versions of an assignment's wrapper.
+
+    Diffing is CPU-bound, so it runs here rather than in the download or rollout
+    that replaced the wrapper.
+
+    Returns:
+        int: The ID of the stored WrapperPatch, or None if no patch was stored.
+    """
+    wrapper_patch = build_patch(assignment_id, from_key, from_name, to_key, to_name)
+    return wrapper_patch.pk if wrapper_patch else None
+
+
+@shared_task
+def rollout_wrapper_template(restart=False):
+    """
+    Rebuilds the stored wrappers that were built from an older wrapper template.
+
+    Only one rollout runs at a time; a run that is queued while another is going
+    returns at once, and the next scheduled run resumes from the checkpoint.
+    """
+    if not cache.add(ROLLOUT_LOCK_KEY, 1, settings.SCORM_WRAPPER_ROLLOUT_LOCK_TIMEOUT):
+        logger.info("A wrapper rollout is already running")
+        return None
+    try:
+        rollout = run_rollout(
+            restart=restart,
+            progress=lambda rollout: logger.info(
+                f"{rollout}: {rollout.checked} checked, {rollout.rebuilt} rebuilt, {rollout.failed} failed"
+            ),
+        )
+        return rollout.pk
+    finally:
+        cache.delete(ROLLOUT_LOCK_KEY)
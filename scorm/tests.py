@@ -1,3 +1,301 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.http import http_date
+
+from clients.models import Client, ClientUser
+from my_scorm_project.file_serving import get_backend, serve_protected_file
+
+from .models import ScormAsset, ScormAssignment, UserScormMapping
+from .tokens import InvalidLaunchToken, read_launch_id, sign_launch_token
+from .utils import encrypt_data
+from .wrappers import WrapperTemplate, WrapperTemplateCache, file_digest
+
+CONFIGURATION = 'var config = { launchID: "{{ ID }}", token: "{{ LAUNCH_TOKEN }}", title: "{{ SCORM_TITLE }}" };'
+LAUNCH_PAGE = "<html><title>{{ SCORM_TITLE }}</title><body>{{ REFERRING_URL }}</body></html>"
+MANIFEST = '<manifest identifier="{{ ID }}"><organization><title>{{ SCORM_TITLE }}</title></organization></manifest>'
+AWKWARD_TITLE = "Health & Safety: Say \"hi\" to <Bob's> \\ team\n"
+
+
+def make_template(directory, members) -> str:
+    path = os.path.join(directory, "template.zip")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as template:
+        for name, data in members.items():
+            template.writestr(f"scorm-wrapper/{name}", data)
+    return path
+
+
+def client_data(i) -> dict:
+    return {
+        "id": f"launch-{i}",
+        "token": f"token-{i}",
+        "scorm_title": f"Course {i}",
+        "referring_url": "lms.example.com",
+    }
+
+
+class WrapperTemplateRenderTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = make_template(
+            directory.name,
+            {
+                "configuration.js": CONFIGURATION,
+                "launch.html": LAUNCH_PAGE,
+                "imsmanifest.xml": MANIFEST,
+                "blob.bin": os.urandom(256 * 1024),
+            },
+        )
+        self.template = WrapperTemplate(path, file_digest(path))
+
+    def assertRendered(self, wrapper, i):
+        with zipfile.ZipFile(io.BytesIO(wrapper)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertIn(f'"launch-{i}"', archive.read("configuration.js").decode())
+            self.assertIn(f"Course {i}", archive.read("launch.html").decode())
+
+    def test_render(self):
+        self.assertRendered(self.template.render(client_data(1)), 1)
+
+    def test_concurrent_renders_do_not_share_member_headers(self):
+        renders = 400
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            wrappers = list(executor.map(lambda i: self.template.render(client_data(i)), range(renders)))
+
+        for i, wrapper in enumerate(wrappers):
+            self.assertRendered(wrapper, i)
+        self.assertEqual(
+            hashlib.sha256(wrappers[7]).hexdigest(),
+            hashlib.sha256(self.template.render(client_data(7))).hexdigest(),
+        )
+
+    def test_values_are_escaped_for_each_member(self):
+        wrapper = self.template.render(dict(client_data(1), scorm_title=AWKWARD_TITLE))
+
+        with zipfile.ZipFile(io.BytesIO(wrapper)) as archive:
+            manifest = ElementTree.fromstring(archive.read("imsmanifest.xml"))
+            self.assertEqual(manifest.find("organization/title").text, AWKWARD_TITLE)
+
+            configuration = archive.read("configuration.js").decode()
+            title = re.search(r'title: ("[^"]*")', configuration).group(1)
+            self.assertEqual(json.loads(title), AWKWARD_TITLE)
+            self.assertIn('launchID: "launch-1"', configuration)
+
+            self.assertIn(
+                "<title>Health &amp; Safety: Say &quot;hi&quot; to &lt;Bob&#x27;s&gt;",
+                archive.read("launch.html").decode(),
+            )
+
+
+class WrapperTemplateCacheTests(SimpleTestCase):
+    def test_reloads_are_logged_with_the_counters(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = make_template(directory.name, {"configuration.js": CONFIGURATION})
+        template_cache = WrapperTemplateCache()
+
+        with self.assertLogs("scorm.wrappers", "INFO") as logs:
+            template = template_cache.get(path)
+            self.assertIs(template_cache.get(path), template)
+            os.utime(path, ns=(0, 0))
+            self.assertIs(template_cache.get(path), template)
+            make_template(directory.name, {"configuration.js": LAUNCH_PAGE})
+            self.assertIsNot(template_cache.get(path), template)
+
+        self.assertEqual(template_cache.stats(), {"hits": 1, "revalidations": 1, "loads": 2, "templates": 1})
+        self.assertEqual(len(logs.output), 3)
+        self.assertIn("Revalidated wrapper template", logs.output[1])
+        self.assertIn("1 hits, 1 revalidations and 2 loads", logs.output[2])
+
+
+def assignment(client_id):
+    return SimpleNamespace(
+        client_id=client_id, scorm_asset_id=7, pk=11, validity_start_date=None, validity_end_date=None
+    )
+
+
+class ReadLaunchIdTests(SimpleTestCase):
+    def setUp(self):
+        self.token = sign_launch_token(assignment(3))
+
+    def test_signed_token(self):
+        client_id, scorm_id, token = read_launch_id(self.token)
+        self.assertEqual((client_id, scorm_id, token.assignment_id), (3, 7, 11))
+
+    def test_forged_token_is_rejected(self):
+        # Another client's claims under this token's signature
+        key_version, _, signature = self.token.split(".")
+        payload = sign_launch_token(assignment(4)).split(".")[1]
+        with self.assertRaises(InvalidLaunchToken):
+            read_launch_id(f"{key_version}.{payload}.{signature}")
+
+    @override_settings(ACCEPT_LEGACY_LAUNCH_IDS=True)
+    def test_legacy_id_while_accepted(self):
+        self.assertEqual(read_launch_id(encrypt_data(3, 7)), (3, 7, None))
+
+    @override_settings(ACCEPT_LEGACY_LAUNCH_IDS=False)
+    def test_legacy_id_is_rejected_after_the_cut_over(self):
+        with self.assertRaises(InvalidLaunchToken):
+            read_launch_id(encrypt_data(3, 7))
+        self.assertEqual(read_launch_id(self.token)[:2], (3, 7))
+
+
+class SeatTests(TestCase):
+    def setUp(self):
+        client = Client.objects.create(first_name="Acme", email="acme@example.com", company="Acme")
+        asset = ScormAsset.objects.create(title="Course", description="", scorm_id=42, scorm_file="course.zip")
+        self.assignment = ScormAssignment.objects.create(client=client, scorm_asset=asset, number_of_seats=2)
+        self.learners = [
+            ClientUser.objects.create(learner_id=f"learner-{i}", client=client, first_name=f"Learner {i}")
+            for i in range(3)
+        ]
+
+    def seats_used(self, assignment=None):
+        return ScormAssignment.objects.values_list("seats_used", flat=True).get(pk=(assignment or self.assignment).pk)
+
+    def test_claims_are_refused_once_the_seats_are_taken(self):
+        self.assertIsNotNone(self.assignment.claim_seat(self.learners[0]))
+        self.assertIsNotNone(self.assignment.claim_seat(self.learners[1]))
+
+        self.assertIsNone(self.assignment.claim_seat(self.learners[2]))
+        self.assertEqual(self.seats_used(), 2)
+        self.assertFalse(UserScormMapping.objects.filter(user=self.learners[2]).exists())
+
+    def test_repeat_claim_by_the_same_learner_takes_no_seat(self):
+        mapping = self.assignment.claim_seat(self.learners[0])
+
+        self.assertEqual(self.assignment.claim_seat(self.learners[0]), mapping)
+        self.assertEqual(self.seats_used(), 1)
+        self.assertEqual(UserScormMapping.objects.filter(assignment=self.assignment).count(), 1)
+
+    def test_deleting_a_mapping_releases_its_seat(self):
+        mapping = self.assignment.claim_seat(self.learners[0])
+        self.assignment.claim_seat(self.learners[1])
+
+        mapping.delete()
+        self.assertEqual(self.seats_used(), 1)
+        self.assertIsNotNone(self.assignment.claim_seat(self.learners[2]))
+
+        # Mappings removed along with their learner give their seat back too
+        self.learners[1].delete()
+        self.assertEqual(self.seats_used(), 1)
+
+    def test_reconcile_seats_recounts_the_mappings(self):
+        self.assignment.claim_seat(self.learners[0])
+        asset = ScormAsset.objects.create(title="Other", description="", scorm_id=43, scorm_file="other.zip")
+        other = ScormAssignment.objects.create(client=self.assignment.client, scorm_asset=asset, number_of_seats=5)
+        ScormAssignment.objects.filter(pk=self.assignment.pk).update(seats_used=2)
+        ScormAssignment.objects.filter(pk=other.pk).update(seats_used=3)
+
+        output = io.StringIO()
+        call_command("reconcile_seats", self.assignment.pk, stdout=output)
+        self.assertEqual(self.seats_used(), 1)
+        self.assertEqual(self.seats_used(other), 3)
+        self.assertIn(f"Assignment {self.assignment.pk}: seats_used 2 -> 1", output.getvalue())
+
+        call_command("reconcile_seats", stdout=io.StringIO())
+        self.assertEqual(self.seats_used(other), 0)
+
+
+@override_settings(PROTECTED_FILE_BACKEND="my_scorm_project.file_serving.FileResponseBackend")
+class ServeProtectedFileTests(SimpleTestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_backend.cache_clear()
+        self.addCleanup(get_backend.cache_clear)
+        self.name = default_storage.save("wrappers/course.zip", ContentFile(self.content))
+
+    def serve(self, **headers):
+        request = RequestFactory().get("/download/", **headers)
+        response = serve_protected_file(request, self.name, "application/zip", "course.zip", "abc123")
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def assertWholeFile(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Range", response)
+        self.assertEqual(self.body(response), self.content)
+
+    def test_whole_file(self):
+        response = self.serve()
+        self.assertWholeFile(response)
+        self.assertEqual(response["ETag"], '"abc123"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="course.zip"')
+
+    def test_not_modified(self):
+        response = self.serve(HTTP_IF_NONE_MATCH='"abc123"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], '"abc123"')
+
+        last_modified = self.serve()["Last-Modified"]
+        self.assertEqual(self.serve(HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertWholeFile(self.serve(HTTP_IF_NONE_MATCH='"other"'))
+
+    def test_byte_ranges(self):
+        for header, first, last in (
+            ("bytes=10-19", 10, 19),
+            ("bytes=1000-", 1000, 1023),
+            ("bytes=1000-5000", 1000, 1023),
+            ("bytes=-24", 1000, 1023),
+        ):
+            with self.subTest(range=header):
+                response = self.serve(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], f"bytes {first}-{last}/1024")
+                self.assertEqual(response["Content-Length"], str(last - first + 1))
+                self.assertEqual(self.body(response), self.content[first : last + 1])
+
+    def test_unsatisfiable_range(self):
+        for header in ("bytes=1024-", "bytes=5000-6000", "bytes=-0"):
+            with self.subTest(range=header):
+                response = self.serve(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_whole_file_instead_of_a_range(self):
+        last_modified = self.serve()["Last-Modified"]
+        for headers in (
+            {"HTTP_RANGE": "bytes=0-1,5-6"},
+            {"HTTP_RANGE": "bytes=20-10"},
+            {"HTTP_RANGE": "items=0-10"},
+            {"HTTP_RANGE": "bytes=0-9", "HTTP_IF_RANGE": '"stale"'},
+            {"HTTP_RANGE": "bytes=0-9", "HTTP_IF_RANGE": http_date(0)},
+        ):
+            with self.subTest(headers=headers):
+                self.assertWholeFile(self.serve(**headers))
+
+        response = self.serve(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.serve(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"abc123"').status_code, 206)
+
+    @override_settings(PROTECTED_FILE_BACKEND="my_scorm_project.file_serving.XAccelRedirectBackend")
+    def test_proxy_backends_leave_ranges_to_the_proxy(self):
+        get_backend.cache_clear()
+        response = self.serve(HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected/{self.name}")
+        self.assertNotIn("Content-Range", response)
+        self.assertEqual(response["ETag"], '"abc123"')
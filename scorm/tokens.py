@@ -0,0 +1,155 @@
+import base64
+import hashlib
+import hmac
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .utils import decrypt_data
+
+SIGNATURE_BYTES = 16
+
+
+class InvalidLaunchToken(ValueError):
+    pass
+
+
+class ExpiredLaunchToken(InvalidLaunchToken):
+    pass
+
+
+@dataclass(frozen=True)
+class LaunchToken:
+    """
+    The claims carried by a signed launch token.
+
+    Attributes:
+        client_id (int): The ID of the client.
+        scorm_id (int): The ID of the SCORM asset.
+        assignment_id (int): The ID of the ScormAssignment the token was issued for.
+        valid_from (int): The start of the validity window as a Unix timestamp, or 0 if open.
+        valid_until (int): The end of the validity window as a Unix timestamp, or 0 if open.
+        key_version (str): The version of the key that signed the token.
+    """
+
+    client_id: int
+    scorm_id: int
+    assignment_id: int
+    valid_from: int
+    valid_until: int
+    key_version: str
+
+    def is_valid_at(self, timestamp) -> bool:
+        if self.valid_from and timestamp < self.valid_from:
+            return False
+        if self.valid_until and timestamp > self.valid_until:
+            return False
+        return True
+
+
+def _b64encode(data) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _signature(key_version, payload) -> str:
+    key = settings.LAUNCH_TOKEN_KEYS[key_version].encode()
+    digest = hmac.new(key, f"{key_version}.{payload}".encode(), hashlib.sha256).digest()
+    return _b64encode(digest[:SIGNATURE_BYTES])
+
+
+def _timestamp(value) -> int:
+    return int(value.timestamp()) if value else 0
+
+
+def sign_launch_token(assignment) -> str:
+    """
+    Issues a signed launch token for a SCORM assignment.
+
+    The token is `<key version>.<payload>.<signature>`, where the payload carries the
+    client, asset and assignment IDs and the assignment's validity window, and the
+    signature is a truncated HMAC-SHA256 made with the current LAUNCH_TOKEN_KEYS key.
+    Every part is URL-safe.
+
+    Args:
+        assignment (ScormAssignment): The saved assignment to issue the token for.
+
+    Returns:
+        str: The signed token.
+    """
+    key_version = settings.LAUNCH_TOKEN_KEY_VERSION
+    claims = (
+        assignment.client_id,
+        assignment.scorm_asset_id,
+        assignment.pk,
+        _timestamp(assignment.validity_start_date),
+        _timestamp(assignment.validity_end_date),
+    )
+    payload = _b64encode("-".join(map(str, claims)).encode())
+    return f"{key_version}.{payload}.{_signature(key_version, payload)}"
+
+
+def verify_launch_token(token) -> LaunchToken:
+    """
+    Checks a launch token's signature and returns its claims.
+
+    Tokens signed with any key still listed in LAUNCH_TOKEN_KEYS are accepted, so keys
+    can be rotated by adding a new version, switching LAUNCH_TOKEN_KEY_VERSION to it and
+    removing the old one once its wrappers have been regenerated.
+
+    Raises:
+        InvalidLaunchToken: If the token is malformed, signed with an unknown key or forged.
+    """
+    try:
+        key_version, payload, signature = token.split(".")
+    except ValueError:
+        raise InvalidLaunchToken("Malformed launch token")
+
+    if key_version not in settings.LAUNCH_TOKEN_KEYS:
+        raise InvalidLaunchToken("Unknown launch token key")
+    if not hmac.compare_digest(signature, _signature(key_version, payload)):
+        raise InvalidLaunchToken("Invalid launch token signature")
+
+    try:
+        claims = [int(claim) for claim in _b64decode(payload).decode().split("-")]
+        return LaunchToken(*claims, key_version=key_version)
+    except (TypeError, ValueError):
+        raise InvalidLaunchToken("Malformed launch token")
+
+
+def read_launch_id(value, check_validity=True):
+    """
+    Reads the client and SCORM IDs from a launch ID.
+
+    Accepts signed launch tokens and, while ACCEPT_LEGACY_LAUNCH_IDS is on, the legacy
+    unsigned base64 "client-scorm" IDs still embedded in older wrappers. Legacy IDs
+    can be forged, so the setting should be turned off once the rollout of a template
+    with {{ LAUNCH_TOKEN }} has finished and the LMSs have picked up the new wrappers.
+
+    Args:
+        value (str): The launch ID sent by the wrapper.
+        check_validity (bool): Whether to reject signed tokens outside their validity window.
+
+    Returns:
+        tuple: The client ID, the SCORM ID and the LaunchToken, which is None for legacy IDs.
+
+    Raises:
+        ExpiredLaunchToken: If the token is outside its validity window.
+        InvalidLaunchToken: If the token is malformed or forged, or a legacy ID is given
+            while they are not accepted.
+        ValueError: If the legacy ID cannot be read.
+    """
+    if "." not in value:
+        if not settings.ACCEPT_LEGACY_LAUNCH_IDS:
+            raise InvalidLaunchToken("Legacy launch IDs are not accepted")
+        client_id, scorm_id = map(int, decrypt_data(value).split("-"))
+        return client_id, scorm_id, None
+
+    token = verify_launch_token(value)
+    if check_validity and not token.is_valid_at(time.time()):
+        raise ExpiredLaunchToken("Launch token outside its validity window")
+    return token.client_id, token.scorm_id, token
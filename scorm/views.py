@@ -6,6 +6,7 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
 from django.shortcuts import redirect, render, get_object_or_404
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.http import (
@@ -16,15 +17,19 @@ from django.http import (
     HttpResponseForbidden,
     HttpResponseNotFound,
     HttpResponseServerError,
+    JsonResponse,
 )
-
-import requests
+from django.urls import reverse
 
 from clients.models import Client
+from my_scorm_project.file_serving import serve_protected_file
+from my_scorm_project.http_client import http_client
 from accounts.decorators import allowed_users
 
 from .forms import ScormUploadForm, AssignSCORMForm
-from .models import ScormAsset, ScormResponse, ScormAssignment
+from .models import ScormAsset, ScormResponse, ScormAssignment, WrapperPatch
+from .packaging import WrapperBuildTimeout, ensure_assignment_wrapper
+from .patches import patch_chain
 
 logger = logging.getLogger(__name__)
 
@@ -65,12 +70,12 @@ def upload_scorm_view(request) -> HttpResponse:
                     "file": scorm_file,
                 }
 
-                response = requests.post(
+                response = http_client.post(
                     settings.API_URL,
                     headers=headers,
                     files=data,
                     verify=True,
-                    timeout=600,
+                    timeout=(settings.HTTP_CONNECT_TIMEOUT, 600),
                 )
 
                 response_data = None
@@ -245,34 +250,132 @@ def assign_scorm(request, client_id) -> HttpResponse:
         request, "clients/client_details.html", {"form": form, "client": client}
     )
 
+def get_client_assignment(client_id, scorm_id):
+    """
+    Returns the assignment of a SCORM package to a client, with its client and asset.
+
+    Raises:
+        Http404: If the client or the SCORM package does not exist.
+        PermissionDenied: If the package is not assigned to the client.
+    """
+    client = get_object_or_404(Client, pk=client_id)
+    scorm = get_object_or_404(ScormAsset, pk=scorm_id)
+
+    assignment = ScormAssignment.objects.select_related("client", "scorm_asset").filter(
+        client=client, scorm_asset=scorm
+    ).first()
+
+    if not assignment:
+        raise PermissionDenied("You do not have access to this SCORM")
+    return assignment
+
+
+def wrapper_build_timeout_response() -> HttpResponse:
+    response = HttpResponse("The SCORM package is still being prepared, please try again shortly.", status=503)
+    response["Retry-After"] = "10"
+    return response
+
+
 @login_required
 @allowed_users(allowed_roles=["coreadmin", "clientadmin"])
 def download_scorm(request, client_id, scorm_id) -> HttpResponse:
     try:
-        client = get_object_or_404(Client, pk=client_id)
-        scorm = get_object_or_404(ScormAsset, pk=scorm_id)
+        assignment = get_client_assignment(client_id, scorm_id)
+        client, scorm = assignment.client, assignment.scorm_asset
 
-        assignment = ScormAssignment.objects.filter(
-            client=client, scorm_asset=scorm
-        ).first()
+        # Built on the first download and reused until the template or the assignment changes
+        name = ensure_assignment_wrapper(assignment)
+        filename = f"{client.first_name}_{scorm.title}.zip"  
+        response = serve_protected_file(request, name, "application/zip", filename, assignment.wrapper_key)
+    except (Http404, PermissionDenied):
+        raise
+    except WrapperBuildTimeout:
+        return wrapper_build_timeout_response()
+    except Exception as e:
+        return HttpResponse(f"An error occurred: {str(e)}", status=500)
 
-        if not assignment:
-            raise PermissionDenied("You do not have access to this SCORM")
+    # Clients send this back to the patches view to update without a full download
+    response["X-Wrapper-Key"] = assignment.wrapper_key
+
+    return response
 
-        if not os.path.exists(assignment.client_scorm_file.path):
-            raise Http404("File not found")
 
-        file = open(assignment.client_scorm_file.path, "rb")
+@login_required
+@allowed_users(allowed_roles=["coreadmin", "clientadmin"])
+def scorm_patch_chain(request, client_id, scorm_id) -> HttpResponse:
+    """
+    Describes the patches that update a client's copy of a SCORM package.
+
+    The copy is identified by the X-Wrapper-Key its download returned, passed as the
+    `from` query parameter. The patches are listed in the order they apply; applying
+    them with bsdiff4 gives the current package, whose SHA-256 is target_digest.
+
+    Returns:
+        JsonResponse: The current wrapper key and the patch chain, or a 404 when there
+        is no chain and the whole package has to be downloaded again.
+    """
+    from_key = request.GET.get("from", "")
+    try:
+        assignment = get_client_assignment(client_id, scorm_id)
+        ensure_assignment_wrapper(assignment)
     except (Http404, PermissionDenied):
         raise
+    except WrapperBuildTimeout:
+        return wrapper_build_timeout_response()
     except Exception as e:
         return HttpResponse(f"An error occurred: {str(e)}", status=500)
 
-    response = FileResponse(file, content_type="application/zip")
-    filename = f"{client.first_name}_{scorm.title}.zip"  
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    chain = patch_chain(assignment, from_key)
+    if chain is None:
+        return JsonResponse(
+            {
+                "error": "No patches lead from this version; download the whole package",
+                "current": assignment.wrapper_key,
+            },
+            status=404,
+        )
+
+    return JsonResponse(
+        {
+            "current": assignment.wrapper_key,
+            "patches": [
+                {
+                    "from": wrapper_patch.from_key,
+                    "to": wrapper_patch.to_key,
+                    "size": wrapper_patch.patch_size,
+                    "target_size": wrapper_patch.target_size,
+                    "target_digest": wrapper_patch.target_digest,
+                    "url": reverse(
+                        "download-scorm-patch",
+                        kwargs={"client_id": client_id, "scorm_id": scorm_id, "patch_id": wrapper_patch.pk},
+                    ),
+                }
+                for wrapper_patch in chain
+            ],
+        }
+    )
+
+
+@login_required
+@allowed_users(allowed_roles=["coreadmin", "clientadmin"])
+def download_scorm_patch(request, client_id, scorm_id, patch_id) -> HttpResponse:
+    """
+    Serves one bsdiff4 patch of a client's SCORM package.
+    """
+    assignment = get_client_assignment(client_id, scorm_id)
+    wrapper_patch = get_object_or_404(WrapperPatch, pk=patch_id, assignment=assignment)
+    if not default_storage.exists(wrapper_patch.patch_file.name):
+        raise Http404("The patch is no longer available")
+
+    return serve_protected_file(
+        request,
+        wrapper_patch.patch_file.name,
+        "application/octet-stream",
+        f"{wrapper_patch.from_key[:12]}-{wrapper_patch.to_key[:12]}.bsdiff",
+        # A patch is determined by the two wrappers it is between
+        f"{wrapper_patch.from_key}-{wrapper_patch.to_key}",
+    )
 
-    return response
 
 @login_required
 @allowed_users(allowed_roles=["coreadmin", "clientadmin"])
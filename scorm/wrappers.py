@@ -0,0 +1,205 @@
+import copy
+import hashlib
+import io
+import logging
+import os
+import struct
+import threading
+import zipfile
+
+from .placeholders import TEXT_EXTENSIONS, CompiledText, escape_for, placeholder_values
+
+logger = logging.getLogger(__name__)
+
+CONFIGURATION_FILE = "configuration.js"
+
+# Local file header: signature, versions, flags, method, time, date, CRC, sizes, name and extra lengths
+LOCAL_HEADER = struct.Struct("<4s5HL2L2H")
+DATA_DESCRIPTOR_FLAG = 0x08
+
+
+def read_raw_member(archive, info) -> bytes:
+    """
+    Returns a member's data exactly as stored in the archive, still compressed.
+    """
+    archive.fp.seek(info.header_offset)
+    header = LOCAL_HEADER.unpack(archive.fp.read(LOCAL_HEADER.size))
+    if header[0] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+    name_length, extra_length = header[-2:]
+    archive.fp.seek(info.header_offset + LOCAL_HEADER.size + name_length + extra_length)
+    return archive.fp.read(info.compress_size)
+
+
+def write_raw_member(archive, info, raw):
+    """
+    Appends a member whose data is already compressed to an archive opened for writing.
+
+    The CRC and sizes of `info` must describe `raw`; they are written in the local
+    header, so no data descriptor follows the data.
+    """
+    info = copy.copy(info)
+    info.flag_bits &= ~DATA_DESCRIPTOR_FLAG
+    info.extra = b""
+    info.header_offset = archive.fp.tell()
+    archive.fp.write(info.FileHeader())
+    archive.fp.write(raw)
+    archive.filelist.append(info)
+    archive.NameToInfo[info.filename] = info
+    archive.start_dir = archive.fp.tell()
+
+
+def compile_member(filename, data):
+    """
+    Compiles a text member of the template.
+
+    Returns:
+        CompiledText: The compiled member, or None if it has no placeholders and can be
+            copied through as it is.
+    """
+    try:
+        text = data.decode()
+    except UnicodeDecodeError:
+        return None
+    escape = escape_for(filename)
+    compiled = CompiledText.compile(text, escape)
+    if compiled is None and filename == CONFIGURATION_FILE:
+        compiled = CompiledText.compile_legacy_configuration(text, escape)
+    return compiled
+
+
+class WrapperTemplate:
+    """
+    A parsed wrapper template, ready to render client wrappers from.
+
+    Attributes:
+        members (list): The (ZipInfo, raw compressed bytes, CompiledText) of every member,
+            already renamed to the archive root. The CompiledText is None for members
+            without placeholders, which are copied through as they are.
+        digest (str): The SHA-256 of the template file.
+    """
+
+    def __init__(self, path, digest):
+        self.digest = digest
+        self.members = []
+        with zipfile.ZipFile(path) as template:
+            for info in template.infolist():
+                if info.is_dir():
+                    continue
+                member = copy.copy(info)
+                member.filename = os.path.basename(info.filename)
+                compiled = None
+                if member.filename.lower().endswith(TEXT_EXTENSIONS):
+                    compiled = compile_member(member.filename, template.read(info))
+                raw = None if compiled else read_raw_member(template, info)
+                self.members.append((member, raw, compiled))
+
+    @property
+    def placeholders(self) -> set:
+        return {name for _, _, compiled in self.members if compiled for name in compiled.names}
+
+    def render(self, client_specific_data) -> bytes:
+        """
+        Builds a client's wrapper zip.
+
+        Args:
+            client_specific_data (dict): The values written into the wrapper: "id" (the
+                launch ID), "token", "referring_url" and "scorm_title".
+
+        Raises:
+            ValueError: If the template has a placeholder the data has no value for.
+        """
+        values = placeholder_values(client_specific_data)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as wrapper:
+            for member, raw, compiled in self.members:
+                if compiled:
+                    # writestr fills in the CRC, sizes and offset of the ZipInfo it is given,
+                    # so the shared template member must not be handed to it
+                    wrapper.writestr(copy.copy(member), compiled.render(values), compress_type=member.compress_type)
+                else:
+                    write_raw_member(wrapper, member, raw)
+        return buffer.getvalue()
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WrapperTemplateCache:
+    """
+    Keeps parsed wrapper templates in memory for the life of the process.
+
+    A template is stat-ed on every use. It is only re-read when its mtime or size has
+    changed, and only re-parsed when its SHA-256 has changed too. Each re-read is logged
+    with the process's counters, so the logs show how often templates were reused.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "revalidations": 0, "loads": 0}
+
+    def get(self, path) -> WrapperTemplate:
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._templates.get(path)
+            if cached and cached[0] == signature:
+                self._stats["hits"] += 1
+                return cached[1]
+
+        digest = file_digest(path)
+        if cached and cached[1].digest == digest:
+            stat_name = "revalidations"
+            template = cached[1]
+        else:
+            stat_name = "loads"
+            template = WrapperTemplate(path, digest)
+
+        with self._lock:
+            self._templates[path] = (signature, template)
+            self._stats[stat_name] += 1
+        stats = self.stats()
+        action = "Revalidated" if stat_name == "revalidations" else "Loaded"
+        logger.info(
+            f"{action} wrapper template {path} ({digest[:12]}); this process has served "
+            f"{stats['hits']} hits, {stats['revalidations']} revalidations and {stats['loads']} loads"
+        )
+        return template
+
+    def stats(self) -> dict:
+        """
+        Returns this process's hit, revalidation and load counters and its number of templates.
+        """
+        with self._lock:
+            return dict(self._stats, templates=len(self._templates))
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+template_cache = WrapperTemplateCache()
+
+
+def build_wrapper(template_path, client_specific_data) -> bytes:
+    """
+    Builds a client's SCORM wrapper from the wrapper template, in memory.
+
+    Every member is stored at the root of the new archive. Members with placeholders
+    are rendered from their compiled text; the others are copied through with their
+    original compressed bytes. The parsed template is kept in template_cache.
+
+    Args:
+        template_path (str): The path of the wrapper template zip.
+        client_specific_data (dict): The values written into the wrapper, see WrapperTemplate.render.
+
+    Returns:
+        bytes: The wrapper zip.
+    """
+    return template_cache.get(template_path).render(client_specific_data)